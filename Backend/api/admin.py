@@ -1,9 +1,78 @@
 from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from . import budget_spend, rollups, search, shards
+from .bulk import delete_transactions
 from .models import Category, Transaction, Budget
 
 
+class UserDataAdmin(admin.ModelAdmin):
+    """
+    Admin for the sharded models. With sharding on, each page works on the
+    database of the rows' owner rather than the admin's own: the owner of
+    the object being changed or deleted, or the user picked with ``?user=``
+    (or the user field of an add form). Changelists without ``?user=``
+    show the rows on ``default``. Users are not joined, as they live on
+    ``default``.
+    """
+
+    def owner_database(self, request, object_id=None):
+        """The database of the rows the request works on; see the class docstring."""
+        if object_id is not None and str(object_id).isdigit():
+            for database in shards.data_databases():
+                user_id = self.model._base_manager.using(database).filter(pk=object_id).values_list(
+                    'user_id', flat=True,
+                ).first()
+                # A moved user's rows can briefly be on both databases
+                if user_id is not None and shards.placement(user_id).database == database:
+                    return database
+            return DEFAULT_DB_ALIAS
+        user_id = request.POST.get('user') or request.GET.get('user')
+        if user_id and user_id.isdigit():
+            return shards.placement(int(user_id)).database
+        return DEFAULT_DB_ALIAS
+
+    def changelist_view(self, request, extra_context=None):
+        if not shards.enabled():
+            return super().changelist_view(request, extra_context)
+        with shards.pinned(self.owner_database(request)):
+            return super().changelist_view(request, extra_context)
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        if not shards.enabled():
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        with shards.pinned(self.owner_database(request, object_id)):
+            return super().changeform_view(request, object_id, form_url, extra_context)
+
+    def delete_view(self, request, object_id, extra_context=None):
+        if not shards.enabled():
+            return super().delete_view(request, object_id, extra_context)
+        with shards.pinned(self.owner_database(request, object_id)):
+            return super().delete_view(request, object_id, extra_context)
+
+    def history_view(self, request, object_id, extra_context=None):
+        if not shards.enabled():
+            return super().history_view(request, object_id, extra_context)
+        with shards.pinned(self.owner_database(request, object_id)):
+            return super().history_view(request, object_id, extra_context)
+
+    def get_list_select_related(self, request):
+        if not shards.enabled():
+            return super().get_list_select_related(request)
+        return [
+            name for name in self.list_display
+            if name != 'user' and self.model._meta.get_field(name).is_relation
+        ]
+
+    def get_search_fields(self, request):
+        fields = super().get_search_fields(request)
+        if not shards.enabled():
+            return fields
+        return [field for field in fields if not field.startswith('user__')]
+
+
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(UserDataAdmin):
     list_display = ['name', 'type', 'user', 'created_at']
     list_filter = ['type', 'created_at']
     search_fields = ['name', 'user__username']
@@ -11,16 +80,51 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(UserDataAdmin):
     list_display = ['type', 'amount', 'category', 'date', 'user', 'created_at']
     list_filter = ['type', 'date', 'created_at']
-    search_fields = ['description', 'category__name', 'user__username']
+    search_fields = ['category__name', 'user__username']
     readonly_fields = ['created_at']
     date_hierarchy = 'date'
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Match descriptions through the full-text index instead of a LIKE scan."""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term.strip():
+            results = results | queryset.filter(search.matching(search_term, queryset.db))
+        return results, may_have_duplicates
+    
+    def save_model(self, request, obj, form, change):
+        """Save through the same rollup and budget counter updates as the API."""
+        database = obj._state.db if change else shards.placement(obj.user_id).database
+        with shards.pinned(database), transaction.atomic(using=database):
+            previous = None
+            if change:
+                previous = Transaction.objects.using(database).select_for_update().filter(pk=obj.pk).first()
+            super().save_model(request, obj, form, change)
+            if previous is not None:
+                rollups.remove_transaction(previous)
+                budget_spend.move_transaction(previous, obj)
+            else:
+                budget_spend.add_transaction(obj)
+            rollups.add_transaction(obj)
+    
+    def delete_model(self, request, obj):
+        """Delete the transaction and remove it from its rollup and budget counters."""
+        with shards.pinned(obj._state.db), transaction.atomic(using=obj._state.db):
+            previous = Transaction.objects.using(obj._state.db).select_for_update().filter(pk=obj.pk).first()
+            if previous is not None and previous.delete()[0]:
+                rollups.remove_transaction(previous)
+                budget_spend.remove_transaction(previous)
+    
+    def delete_queryset(self, request, queryset):
+        """Delete the selected transactions like the bulk-delete endpoint, one owner at a time."""
+        for user in User.objects.filter(pk__in=set(queryset.values_list('user_id', flat=True))):
+            delete_transactions(user, queryset.filter(user=user))
 
 
 @admin.register(Budget)
-class BudgetAdmin(admin.ModelAdmin):
+class BudgetAdmin(UserDataAdmin):
     list_display = ['category', 'amount', 'period', 'start_date', 'user', 'created_at']
     list_filter = ['period', 'start_date', 'created_at']
     search_fields = ['category__name', 'user__username']
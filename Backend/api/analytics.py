@@ -0,0 +1,149 @@
+"""
+Analytics
+
+Income/expense time series bucketed by day, week or month. Buckets are
+computed in the database by truncating dates of the per-day rollup table,
+so the work done is bounded by the number of days and categories in range
+rather than the number of transactions. Totals are integer cents (see
+``api.money``).
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import DailyRollup, Transaction
+from .money import format_cents, to_cents
+
+BUCKETS = ('day', 'week', 'month')
+MAX_BUCKETS = 1000
+
+
+def bucket_start(value, bucket):
+    """Return the first day of the bucket that contains ``value``."""
+    if bucket == 'week':
+        return value - timedelta(days=value.weekday())
+    if bucket == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, bucket):
+    """Return the first day of the bucket after the one starting at ``value``."""
+    if bucket == 'week':
+        return value + timedelta(days=7)
+    if bucket == 'month':
+        return (value + timedelta(days=32)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def _period_expression(bucket):
+    if bucket == 'week':
+        return TruncWeek('date')
+    if bucket == 'month':
+        return TruncMonth('date')
+    return F('date')
+
+
+def _bucket_range(first, last, bucket):
+    current = bucket_start(first, bucket)
+    while current <= last:
+        yield current
+        current = next_bucket(current, bucket)
+
+
+def timeseries(user, bucket='month', start_date=None, end_date=None, by_category=False):
+    """
+    Return income, expense and net totals per bucket for ``user``.
+
+    Buckets without activity between the first and last bucket in range are
+    filled with zeros. With ``by_category`` the result also carries one
+    series per category. Raises ValueError if the range needs more than
+    ``MAX_BUCKETS`` buckets.
+    """
+    rollups = DailyRollup.objects.filter(user=user, count__gt=0)
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        rollups = rollups.filter(date__lte=end_date)
+    rollups = rollups.annotate(period=_period_expression(bucket))
+
+    grouped = {}
+    for row in rollups.values('period', 'type').annotate(total=Sum('total')).order_by('period'):
+        grouped.setdefault(row['period'], {})[row['type']] = row['total']
+
+    first = start_date or min(grouped, default=None)
+    last = end_date or max(grouped, default=None)
+    buckets = list(islice(_bucket_range(first, last, bucket), MAX_BUCKETS + 1)) if first and last else []
+    if len(buckets) > MAX_BUCKETS:
+        raise ValueError(f'Range spans more than {MAX_BUCKETS} {bucket} buckets')
+
+    series = []
+    for period in buckets:
+        totals = grouped.get(period, {})
+        income = to_cents(totals.get(Transaction.INCOME))
+        expense = to_cents(totals.get(Transaction.EXPENSE))
+        series.append({
+            'period': period,
+            'income': income,
+            'expense': expense,
+            'net': income - expense,
+        })
+    result = {'bucket': bucket, 'series': series}
+
+    if by_category:
+        categories = {}
+        rows = rollups.values(
+            'period', 'category_id', 'category__name', 'type'
+        ).annotate(total=Sum('total')).order_by('period')
+        for row in rows:
+            key = (row['category_id'], row['type'])
+            entry = categories.setdefault(key, {
+                'category': row['category_id'],
+                'category_name': row['category__name'],
+                'type': row['type'],
+                'totals': {},
+            })
+            entry['totals'][row['period']] = row['total']
+        result['categories'] = [
+            {
+                'category': entry['category'],
+                'category_name': entry['category_name'],
+                'type': entry['type'],
+                'series': [
+                    {'period': period, 'total': to_cents(entry['totals'].get(period))}
+                    for period in buckets
+                ],
+            }
+            for entry in categories.values()
+        ]
+    return result
+
+
+def format_timeseries(data, amount_format):
+    """Render a ``timeseries`` result in ``amount_format``."""
+    formatted = {
+        'bucket': data['bucket'],
+        'series': [
+            {
+                'period': point['period'],
+                'income': format_cents(point['income'], amount_format),
+                'expense': format_cents(point['expense'], amount_format),
+                'net': format_cents(point['net'], amount_format),
+            }
+            for point in data['series']
+        ],
+    }
+    if 'categories' in data:
+        formatted['categories'] = [
+            {
+                **entry,
+                'series': [
+                    {'period': point['period'], 'total': format_cents(point['total'], amount_format)}
+                    for point in entry['series']
+                ],
+            }
+            for entry in data['categories']
+        ]
+    return formatted
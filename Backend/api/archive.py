@@ -0,0 +1,59 @@
+"""
+Transaction archival
+
+Moves transactions dated before the retention window
+(``TRANSACTION_RETENTION_DAYS``) from the transaction table to
+``ArchivedTransaction``, so listing, search and the write paths work on
+the recent rows only. Archived rows keep their ids and still count in
+the daily rollups, budget spend counters and balance snapshots, which are
+left as they are: summaries do not change.
+
+The transaction API lists and retrieves archived rows with
+``?archived=true``; they are read-only. The search index covers the
+transaction table only, so searches over archived rows match
+descriptions without it.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import ArchivedTransaction, Transaction
+
+ARCHIVED_FIELDS = ['id', 'user_id', 'category_id', 'amount', 'description', 'date', 'type', 'created_at']
+
+
+def cutoff(today=None):
+    """The first date kept in the transaction table."""
+    return (today or timezone.localdate()) - timedelta(days=settings.TRANSACTION_RETENTION_DAYS)
+
+
+def archive(user_ids=None, before=None, batch_size=2000):
+    """
+    Move transactions dated before ``before`` (default: ``cutoff()``) to
+    the archive, for all users or only ``user_ids``, one transaction per
+    batch. Returns the number of transactions moved.
+    """
+    transactions = Transaction.objects.filter(date__lt=before or cutoff())
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+    database = router.db_for_write(Transaction)
+
+    moved = 0
+    while True:
+        with transaction.atomic(using=database):
+            # Locked until the batch is deleted, so a concurrent update of
+            # one of these rows waits rather than being lost.
+            rows = list(
+                transactions.select_for_update().order_by('pk').values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ArchivedTransaction.objects.bulk_create([ArchivedTransaction(**row) for row in rows])
+            # Rollups and counters keep counting the rows; the post_delete
+            # signal bumps each owner's data version, as lists and exports
+            # change.
+            Transaction.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+    return moved
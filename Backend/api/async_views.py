@@ -0,0 +1,137 @@
+"""
+Async summary views
+
+Async (ASGI) variants of financial_summary, category_summary and
+budget_status. They use Django's async ORM and cache APIs so that, when
+served by an ASGI server such as uvicorn, a slow aggregate does not hold
+a worker while it waits on the database. Once the session user is known,
+the throttle bucket and the data version are fetched concurrently with
+``asyncio.gather``, each in a worker thread with its own database
+connection (the async ORM runs every query on one shared thread, so
+gathered ORM calls would still run one after another). The summaries
+themselves are single queries.
+
+Responses match the sync endpoints and carry the same kind of
+ETag/Last-Modified validators. These are plain Django views (DRF 3.14 has
+no async views), so they accept session authentication only, and draw
+from the same ``summary`` throttle bucket as the sync endpoints.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connections
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import summary_cache, throttling
+from .conditional import arespond
+from .budgets import aevaluate_budgets, format_status
+from .money import parse_amount_format
+from .summaries import acategory_totals, afinancial_totals, format_categories, format_financial
+
+
+def _in_transaction():
+    return any(connection.in_atomic_block for connection in connections.all(initialized_only=True))
+
+
+def _releasing_connections(func):
+    def call(*args):
+        try:
+            return func(*args)
+        finally:
+            # Worker threads see no request_finished signal
+            close_old_connections()
+    return call
+
+
+async def gather_calls(*calls):
+    """
+    Run ``(func, *args)`` calls concurrently and return their results in
+    order. Each runs in a worker thread with that thread's own database
+    connections. Inside a transaction they run one after another on the
+    shared thread instead, so they see the transaction's writes.
+    """
+    if await sync_to_async(_in_transaction)():
+        return [await sync_to_async(func)(*args) for func, *args in calls]
+    return await asyncio.gather(*(
+        sync_to_async(_releasing_connections(func), thread_sensitive=False)(*args) for func, *args in calls
+    ))
+
+
+def _session_user(request):
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder)
+
+
+async def _check_request(request):
+    """
+    Return (user, amount_format, data state, None) for a valid GET
+    request, or (None, None, None, error response).
+    """
+    if request.method != 'GET':
+        return None, None, None, HttpResponseNotAllowed(['GET'])
+    # request.user is resolved lazily with the sync ORM
+    user = await sync_to_async(_session_user)(request)
+    if user is None:
+        return None, None, None, _json({'detail': 'Authentication credentials were not provided.'}, status=403)
+    wait, state = await gather_calls(
+        (throttling.take, 'summary', user.pk), (summary_cache.get_state, user.id),
+    )
+    if wait is not None:
+        seconds = throttling.retry_after(wait)
+        response = _json({'detail': f'Request was throttled. Expected available in {seconds} seconds.'}, status=429)
+        response.headers['Retry-After'] = str(seconds)
+        return None, None, None, response
+    try:
+        amount_format = parse_amount_format(request.GET.get('amount_format'))
+    except ValueError as exc:
+        return None, None, None, _json({'detail': str(exc)}, status=400)
+    return user, amount_format, state, None
+
+
+async def financial_summary(request):
+    """Async variant of ``views.financial_summary``."""
+    user, amount_format, state, error = await _check_request(request)
+    if error:
+        return error
+
+    async def build():
+        data = await summary_cache.aget_or_compute(
+            user.id, 'financial_summary', lambda: afinancial_totals(user), state[0]
+        )
+        return _json(format_financial(data, amount_format))
+    return await arespond(request, user, state, build)
+
+
+async def category_summary(request):
+    """Async variant of ``views.category_summary``."""
+    user, amount_format, state, error = await _check_request(request)
+    if error:
+        return error
+
+    async def build():
+        data = await summary_cache.aget_or_compute(
+            user.id, 'category_summary', lambda: acategory_totals(user), state[0]
+        )
+        return _json({'category_summary': format_categories(data, amount_format)})
+    return await arespond(request, user, state, build)
+
+
+async def budget_status(request):
+    """Async variant of ``views.budget_status``."""
+    user, amount_format, state, error = await _check_request(request)
+    if error:
+        return error
+
+    async def build():
+        today = timezone.localdate()
+        data = await summary_cache.aget_or_compute(
+            user.id, f'budget_status:{today.isoformat()}', lambda: aevaluate_budgets(user, today), state[0]
+        )
+        return _json({'budget_status': format_status(data, amount_format)})
+    return await arespond(request, user, state, build, vary_on_date=True)
@@ -1,5 +1,5 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import authenticate, login, logout
@@ -11,9 +11,12 @@ from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 import json
 
+from .throttling import AuthIPThrottle, LoginUserThrottle
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, LoginUserThrottle])
 def login_view(request):
     """
     Login
@@ -27,6 +30,7 @@ def login_view(request):
     Responses:
     - 200 OK: user details and success message
     - 400/401 for invalid input or credentials
+    - 429 when the client IP or the username is over its attempt budget
     """
     data = json.loads(request.body)
     username = data.get('username')
@@ -62,6 +66,7 @@ def login_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle])
 def register_view(request):
     """
     Register
@@ -74,6 +79,8 @@ def register_view(request):
     - password (string, required)
     - first_name (string, optional)
     - last_name (string, optional)
+
+    Returns 429 when the client IP is over its attempt budget.
     """
     data = json.loads(request.body)
     username = data.get('username')
@@ -0,0 +1,358 @@
+"""
+Benchmark helpers
+
+Synthetic data seeding and timing utilities shared by the benchmark
+management commands. Seeded users are named ``<prefix>-<n>`` and all
+share the password ``BENCH_PASSWORD`` so they can log in over HTTP.
+Seeding bulk-inserts transactions, then brings the daily rollups, budget
+spend counters, balance snapshots and data versions of the seeded users
+up to date, so the ``--verify`` checks pass afterwards. Point
+``DB_NAME``/``DB_ENGINE`` at a scratch database before seeding.
+"""
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from http.cookies import SimpleCookie
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver
+
+from . import budget_spend, rollups, shards, snapshots, summary_cache, urls
+from .models import Budget, Category, Transaction
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def seed(users=1, categories=10, transactions=10000, budgets=5, days=3650,
+         prefix='bench', random_seed=0, batch_size=5000, stdout=None):
+    """
+    Create ``users`` synthetic users, each with ``categories`` categories,
+    ``budgets`` budgets and ``transactions`` transactions spread over the
+    last ``days`` days. Existing users with the same prefix are replaced.
+    Returns the created users.
+    """
+    rng = random.Random(random_seed)
+    today = date.today()
+    password = make_password(BENCH_PASSWORD)
+
+    User.objects.filter(username__startswith=f'{prefix}-').delete()
+    created = []
+    for n in range(users):
+        user = User.objects.create(username=f'{prefix}-{n}', password=password)
+        database = shards.placement(user.pk).database
+        with shards.pinned(database), transaction.atomic(using=database):
+            user_categories = Category.objects.bulk_create([
+                Category(user=user, name=f'category-{i}',
+                         type=Category.INCOME if i % 4 == 0 else Category.EXPENSE)
+                for i in range(categories)
+            ])
+            if not user_categories:
+                user_categories = [None]
+            Budget.objects.bulk_create([
+                Budget(user=user, category=category, amount=Decimal(rng.randrange(100, 5000)),
+                       period=rng.choice([Budget.WEEKLY, Budget.MONTHLY, Budget.YEARLY]))
+                for category in user_categories[:budgets] if category is not None
+            ])
+
+            batch = []
+            for _ in range(transactions):
+                category = rng.choice(user_categories)
+                batch.append(Transaction(
+                    user=user,
+                    category=category,
+                    amount=Decimal(rng.randrange(100, 100000)) / 100,
+                    description=f'synthetic transaction {rng.randrange(1_000_000)}',
+                    date=today - timedelta(days=rng.randrange(days)),
+                    type=category.type if category else Transaction.EXPENSE,
+                ))
+                if len(batch) >= batch_size:
+                    Transaction.objects.bulk_create(batch)
+                    batch = []
+            Transaction.objects.bulk_create(batch)
+            rollups.rebuild([user.id])
+            budget_spend.rebuild([user.id])
+            snapshots.take([user.id])
+            summary_cache.invalidate(user.id, using=database)
+        created.append(user)
+        if stdout is not None:
+            stdout.write(f'Seeded {user.username}: {transactions} transactions')
+    return created
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples`` (nearest-rank)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def time_calls(func, iterations, warmup=1):
+    """Call ``func`` repeatedly and return per-call wall times in milliseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples):
+    """Return mean/p50/p95/p99 (ms) for a list of samples."""
+    return {
+        'mean_ms': round(statistics.fmean(samples), 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+    }
+
+
+# Requests driven by ``benchmark_api``: (name, url name, method, path, body).
+# Paths and bodies are formatted with the ids returned by ``route_context``.
+ROUTES = [
+    ('health', 'health-check', 'GET', '/api/health/', None),
+    ('api root', 'api-root', 'GET', '/api/', None),
+    ('current user', 'user', 'GET', '/api/auth/user/', None),
+    ('login', 'login', 'POST', '/api/auth/login/',
+     '{{"username": "{username}", "password": "' + BENCH_PASSWORD + '"}}'),
+    ('categories list', 'category-list', 'GET', '/api/categories/', None),
+    ('categories retrieve', 'category-detail', 'GET', '/api/categories/{category}/', None),
+    ('transactions list', 'transaction-list', 'GET', '/api/transactions/', None),
+    ('transactions filtered list', 'transaction-list', 'GET',
+     '/api/transactions/?type=expense&category={category}&start_date={month_start}', None),
+    ('transactions cursor list', 'transaction-list', 'GET', '/api/transactions/?pagination=cursor&page_size=50', None),
+    ('transactions retrieve', 'transaction-detail', 'GET', '/api/transactions/{transaction}/', None),
+    ('transactions create', 'transaction-list', 'POST', '/api/transactions/',
+     '{{"category": {category}, "amount": "12.34", "date": "{today}", "type": "expense"}}'),
+    ('transactions bulk import', 'transaction-bulk', 'POST', '/api/transactions/bulk/',
+     'amount,type,date,category\n' + '12.34,expense,{today},{category}\n' * 10),
+    ('transactions export', 'transaction-export', 'GET',
+     '/api/transactions/export/?start_date={month_start}', None),
+    ('budgets list', 'budget-list', 'GET', '/api/budgets/', None),
+    ('budgets retrieve', 'budget-detail', 'GET', '/api/budgets/{budget}/', None),
+    ('financial summary', 'financial-summary', 'GET', '/api/financial-summary/', None),
+    ('category summary', 'category-summary', 'GET', '/api/category-summary/', None),
+    ('budget status', 'budget-status', 'GET', '/api/budget-status/', None),
+    ('budget history', 'budget-history-list', 'GET', '/api/budget-history/', None),
+    ('budget history detail', 'budget-history', 'GET', '/api/budgets/{budget}/history/', None),
+    ('dashboard', 'dashboard', 'GET', '/api/dashboard/', None),
+    ('analytics timeseries', 'analytics-timeseries', 'GET', '/api/analytics/timeseries/?breakdown=category', None),
+]
+
+# Summary routes and their async (ASGI) variants, for ``benchmark_async``
+SYNC_SUMMARY_ROUTES = [
+    ('financial summary', 'financial-summary', 'GET', '/api/financial-summary/', None),
+    ('category summary', 'category-summary', 'GET', '/api/category-summary/', None),
+    ('budget status', 'budget-status', 'GET', '/api/budget-status/', None),
+]
+ASYNC_SUMMARY_ROUTES = [
+    ('financial summary', 'async-financial-summary', 'GET', '/api/async/financial-summary/', None),
+    ('category summary', 'async-category-summary', 'GET', '/api/async/category-summary/', None),
+    ('budget status', 'async-budget-status', 'GET', '/api/async/budget-status/', None),
+]
+ROUTES += ASYNC_SUMMARY_ROUTES
+
+# Routes deliberately left out: they destroy the session, create accounts
+# or need an admin user.
+SKIPPED_ROUTES = {'logout', 'register', 'summary-cache-stats', 'metrics', 'throttle-stats'}
+
+
+def route_context(user):
+    """Return the ids and dates used to format ``ROUTES`` for ``user``."""
+    today = date.today()
+    category = user.categories.filter(type=Category.EXPENSE).first()
+    return {
+        'username': user.username,
+        'category': category.id,
+        'transaction': user.transactions.values_list('id', flat=True).first(),
+        'budget': user.budgets.values_list('id', flat=True).first(),
+        'today': today.isoformat(),
+        'month_start': today.replace(day=1).isoformat(),
+    }
+
+
+def uncovered_routes():
+    """Return url names in ``api.urls`` that no benchmark route exercises."""
+    names = set()
+
+    def collect(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                collect(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.add(pattern.name)
+
+    collect(urls.urlpatterns)
+    return sorted(names - {route[1] for route in ROUTES} - SKIPPED_ROUTES)
+
+
+def _content_type(body):
+    return 'text/csv' if body and not body.startswith('{') else 'application/json'
+
+
+@override_settings(THROTTLE_ENABLED=False)
+def run_client(user, iterations, warmup=2):
+    """
+    Drive every route in-process through the Django test client, with
+    throttling off. Returns per-route latency stats, requests/sec and
+    queries per request.
+    """
+    context = route_context(user)
+    client = Client()
+    client.force_login(user)
+    results = {}
+    for name, _, method, path, body in ROUTES:
+        path = path.format(**context)
+        data = body.format(**context) if body else ''
+        samples, queries = [], []
+        for attempt in range(warmup + iterations):
+            # The query log is a bounded deque; once full (e.g. after
+            # seeding) CaptureQueriesContext would see no new queries.
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.generic(method, path, data, content_type=_content_type(body))
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name}: {method} {path} returned {response.status_code}')
+            if attempt >= warmup:
+                samples.append(elapsed)
+                queries.append(len(captured.captured_queries))
+        results[name] = dict(
+            summarize(samples),
+            requests_per_sec=round(len(samples) / (sum(samples) / 1000), 2),
+            queries_per_request=round(statistics.fmean(queries), 2),
+        )
+    return results
+
+
+def _http_request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        response.read()
+        return response
+    finally:
+        conn.close()
+
+
+def start_gunicorn(port, workers, log_path=None, app='dotproduct_backend.wsgi:application', worker_class=None):
+    """
+    Start gunicorn on ``port`` with the current settings (throttling off)
+    and wait until it answers. Pass the ASGI app and ``uvicorn.workers.UvicornWorker`` as
+    ``worker_class`` to serve the project under uvicorn.
+    """
+    env = dict(os.environ, ALLOWED_HOSTS='127.0.0.1,localhost', METRICS_LOG_LEVEL='WARNING', THROTTLE_ENABLED='False')
+    log = open(log_path, 'ab') if log_path else subprocess.DEVNULL
+    command = [sys.executable, '-m', 'gunicorn', app, '--bind', f'127.0.0.1:{port}', '--workers', str(workers)]
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=log)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            if _http_request(port, 'GET', '/api/health/').status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 30 seconds')
+
+
+def free_port():
+    """Return a TCP port on 127.0.0.1 that is free right now."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_http(user, port, iterations, concurrency, routes=ROUTES):
+    """
+    Drive ``routes`` (default: every route) over HTTP against a running
+    server on ``port`` with ``concurrency`` client threads. Returns
+    per-route latency stats and requests/sec (query counts are not
+    observable from outside).
+    """
+    context = route_context(user)
+    login = _http_request(
+        port, 'POST', '/api/auth/login/',
+        body=f'{{"username": "{user.username}", "password": "{BENCH_PASSWORD}"}}',
+        headers={'Content-Type': 'application/json'},
+    )
+    cookies = SimpleCookie()
+    for header in login.msg.get_all('Set-Cookie') or []:
+        cookies.load(header)
+    csrf = cookies['csrftoken'].value if 'csrftoken' in cookies else ''
+    base_headers = {
+        'Cookie': '; '.join(f'{key}={morsel.value}' for key, morsel in cookies.items()),
+        'X-CSRFToken': csrf,
+    }
+
+    results = {}
+    for name, url_name, method, path, body in routes:
+        path = path.format(**context)
+        data = body.format(**context).encode() if body else None
+        # Logging in again on the benchmark session would rotate its key
+        headers = {} if url_name == 'login' else dict(base_headers)
+        if body:
+            headers['Content-Type'] = _content_type(body)
+
+        def one_request(_):
+            started = time.perf_counter()
+            response = _http_request(port, method, path, data, headers)
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status >= 400:
+                raise RuntimeError(f'{name}: {method} {path} returned {response.status}')
+            return elapsed
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one_request, range(concurrency)))  # warm up every worker
+            started = time.perf_counter()
+            samples = list(pool.map(one_request, range(iterations)))
+            wall = time.perf_counter() - started
+        results[name] = dict(summarize(samples), requests_per_sec=round(len(samples) / wall, 2))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare benchmark ``results`` with a stored ``baseline`` of the same
+    shape. Returns a list of human-readable regressions: p50 latency more
+    than ``tolerance`` (fraction) slower, or more queries per request.
+    """
+    regressions = []
+    for driver, routes in results.items():
+        for name, current in routes.items():
+            previous = baseline.get(driver, {}).get(name)
+            if not previous:
+                continue
+            if current['p50_ms'] > previous['p50_ms'] * (1 + tolerance):
+                regressions.append(
+                    f"{driver} / {name}: p50 {previous['p50_ms']} -> {current['p50_ms']} ms"
+                )
+            if current.get('queries_per_request', 0) > previous.get('queries_per_request', float('inf')):
+                regressions.append(
+                    f"{driver} / {name}: queries {previous['queries_per_request']} -> {current['queries_per_request']}"
+                )
+    return regressions
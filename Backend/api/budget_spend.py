@@ -0,0 +1,206 @@
+"""
+Budget spend counters
+
+Keeps ``BudgetSpend`` rows in step with Transaction writes. Each row holds
+the total amount and count of a budget category's transactions dated in
+one period of the budget (keyed by the period's first day), so budget
+status reads one counter per budget instead of summing transactions.
+
+Counters are adjusted with ``F()`` updates and exist for every period
+that has transactions; a period without a row has no spend yet, so a new
+week, month or year starts from zero without any rollover job. A budget's
+counters are recomputed from raw transactions whenever the budget is
+saved (see ``api.signals``), which covers a changed category or period.
+
+Callers should run the transaction helpers in the same database
+transaction as the Transaction write they mirror, next to the matching
+``api.rollups`` call.
+"""
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+from .budgets import period_window
+from .models import ArchivedTransaction, Budget, BudgetSpend, Transaction
+
+# Truncations matching ``period_window``'s period starts (weeks start on
+# Monday); unknown periods fall back to the calendar month there too.
+PERIOD_TRUNCS = {Budget.WEEKLY: TruncWeek, Budget.MONTHLY: TruncMonth, Budget.YEARLY: TruncYear}
+
+
+def _apply_one(budget_id, period_start, amount, count):
+    """Add ``amount`` and ``count`` to a counter, creating it if missing."""
+    changes = {'total': F('total') + amount, 'count': F('count') + count}
+    counters = BudgetSpend.objects.filter(budget_id=budget_id, period_start=period_start)
+    if counters.update(**changes):
+        return
+    try:
+        with transaction.atomic(using=counters.db):
+            BudgetSpend.objects.create(budget_id=budget_id, period_start=period_start, total=amount, count=count)
+    except IntegrityError:
+        # A concurrent writer created the row first; add to theirs.
+        counters.update(**changes)
+
+
+def apply(rows):
+    """
+    Add ``(category_id, date, amount, count)`` rows to the counters of
+    every budget on each category. Looks up the budgets with one query and
+    issues one update per affected (budget, period) counter.
+    """
+    rows = [row for row in rows if row[0] is not None]
+    if not rows:
+        return
+    budgets = {}
+    for budget in Budget.objects.filter(category_id__in={row[0] for row in rows}).values(
+        'id', 'category_id', 'period',
+    ):
+        budgets.setdefault(budget['category_id'], []).append((budget['id'], budget['period']))
+
+    deltas = {}
+    for category_id, day, amount, count in rows:
+        for budget_id, period in budgets.get(category_id, ()):
+            key = (budget_id, period_window(period, day)[0])
+            total, number = deltas.get(key, (0, 0))
+            deltas[key] = (total + amount, number + count)
+    for (budget_id, period_start), (amount, count) in deltas.items():
+        if amount or count:
+            _apply_one(budget_id, period_start, amount, count)
+
+
+def add_transaction(instance):
+    """Count a newly saved transaction in its budgets' counters."""
+    apply([(instance.category_id, instance.date, instance.amount, 1)])
+
+
+def add_transactions(instances):
+    """Count a batch of new transactions, one update per affected counter."""
+    apply([(instance.category_id, instance.date, instance.amount, 1) for instance in instances])
+
+
+def remove_transaction(instance):
+    """Remove a transaction's previous contribution from its budgets' counters."""
+    apply([(instance.category_id, instance.date, -instance.amount, -1)])
+
+
+def move_transaction(previous, instance):
+    """
+    Move an updated transaction from the counters of its ``previous``
+    state to those of its saved state. Costs no queries unless the
+    category, date or amount changed.
+    """
+    before = (previous.category_id, previous.date, previous.amount)
+    after = (instance.category_id, instance.date, instance.amount)
+    if before != after:
+        apply([(*before[:2], -previous.amount, -1), (*after, 1)])
+
+
+def _aggregate(queryset):
+    return queryset.values('category_id', 'date').annotate(total=Sum('amount'), count=Count('id')).order_by()
+
+
+def remove_transactions(queryset):
+    """
+    Remove the contribution of every transaction in ``queryset`` from the
+    counters. Call before deleting them with a set-based DELETE.
+    """
+    apply([
+        (row['category_id'], row['date'], -row['total'], -row['count'])
+        for row in _aggregate(queryset)
+    ])
+
+
+def move_transactions(queryset, changes):
+    """
+    Move the transactions in ``queryset`` to the counters they will belong
+    to once ``changes`` (see ``rollups.move_transactions``) is applied with
+    a set-based UPDATE. Call before the UPDATE. Changes that touch no
+    category, date or amount cost no queries.
+    """
+    if not {'category_id', 'date', 'amount'} & changes.keys():
+        return
+    rows = []
+    for row in _aggregate(queryset):
+        rows.append((row['category_id'], row['date'], -row['total'], -row['count']))
+        rows.append((
+            changes.get('category_id', row['category_id']),
+            changes.get('date', row['date']),
+            changes['amount'] * row['count'] if 'amount' in changes else row['total'],
+            row['count'],
+        ))
+    apply(rows)
+
+
+def expected(budgets):
+    """
+    Return ``{(budget_id, period_start): (total, count)}`` computed from
+    raw transactions, archived ones included, for the budgets in
+    ``budgets``, with two grouped queries per budget period in use.
+    """
+    by_period = {}
+    for budget in budgets.values('id', 'category_id', 'period'):
+        by_period.setdefault(budget['period'], {}).setdefault(budget['category_id'], []).append(budget['id'])
+
+    result = {}
+    for period, categories in by_period.items():
+        for model in (Transaction, ArchivedTransaction):
+            rows = model.objects.filter(category_id__in=categories).annotate(
+                period_start=PERIOD_TRUNCS.get(period, TruncMonth)('date'),
+            ).values('category_id', 'period_start').annotate(total=Sum('amount'), count=Count('id')).order_by()
+            for row in rows.iterator():
+                for budget_id in categories[row['category_id']]:
+                    total, count = result.get((budget_id, row['period_start']), (0, 0))
+                    result[budget_id, row['period_start']] = (total + row['total'], count + row['count'])
+    return result
+
+
+def _budgets(user_ids=None, budget_ids=None):
+    budgets = Budget.objects.all()
+    if user_ids is not None:
+        budgets = budgets.filter(user_id__in=user_ids)
+    if budget_ids is not None:
+        budgets = budgets.filter(pk__in=budget_ids)
+    return budgets
+
+
+def rebuild(user_ids=None, budget_ids=None, batch_size=2000):
+    """
+    Recompute counters from raw transactions, for all budgets or only
+    those of ``user_ids`` / ``budget_ids``. Returns the number of counter
+    rows written.
+    """
+    budgets = _budgets(user_ids, budget_ids)
+    with transaction.atomic(using=router.db_for_write(BudgetSpend)):
+        BudgetSpend.objects.filter(budget__in=budgets).delete()
+        rows = [
+            BudgetSpend(budget_id=budget_id, period_start=period_start, total=total, count=count)
+            for (budget_id, period_start), (total, count) in expected(budgets).items()
+        ]
+        BudgetSpend.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def verify(user_ids=None):
+    """
+    Compare stored counters with raw transaction sums. Returns a list of
+    ``(key, expected, actual)`` tuples for every mismatching
+    ``(budget_id, period_start)`` key, where expected and actual are
+    ``(total, count)`` pairs.
+    """
+    budgets = _budgets(user_ids)
+    wanted = expected(budgets)
+    # Counters emptied by deletes or moves are kept at zero and count as
+    # absent. They are filtered after the decimal conversion: on SQLite the
+    # F() updates leave a float residue such as -1e-16 in the column.
+    stored = {
+        (row['budget_id'], row['period_start']): (row['total'], row['count'])
+        for row in BudgetSpend.objects.filter(budget__in=budgets).values(
+            'budget_id', 'period_start', 'total', 'count',
+        ).iterator()
+        if row['total'] or row['count']
+    }
+    return [
+        (key, wanted.get(key), stored.get(key))
+        for key in sorted(wanted.keys() | stored.keys(), key=str)
+        if wanted.get(key) != stored.get(key)
+    ]
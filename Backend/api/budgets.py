@@ -0,0 +1,183 @@
+"""
+Budget evaluation
+
+Computes budgeted vs actual amounts for every budget a user owns. Actuals
+are read from the incrementally maintained spend counters (see
+``api.budget_spend``): one indexed counter lookup per budget, for the
+period window (weekly, monthly, yearly) containing today, all in the same
+query as the budgets. Budget history reads the counters of the last N
+periods of every budget at once. Amounts are integer cents (see
+``api.money``).
+"""
+from datetime import date, timedelta
+
+from django.db.models import Case, DateField, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .models import Budget, BudgetSpend
+from .money import format_amounts, format_cents, to_cents
+
+STATUS_AMOUNT_FIELDS = ('budgeted_amount', 'actual_amount', 'remaining')
+HISTORY_AMOUNT_FIELDS = ('actual_amount', 'remaining')
+DEFAULT_HISTORY_PERIODS = 12
+MAX_HISTORY_PERIODS = 120
+
+
+def period_window(period, today):
+    """
+    Return the inclusive (start, end) dates of the budget period that
+    contains ``today``. Weeks start on Monday; unknown periods fall back
+    to the calendar month.
+    """
+    if period == Budget.WEEKLY:
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if period == Budget.YEARLY:
+        return date(today.year, 1, 1), date(today.year, 12, 31)
+    start = today.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+
+def current_windows(today):
+    """Return {period: (start, end)} for the periods containing ``today``."""
+    return {period: period_window(period, today) for period, _ in Budget.PERIOD_CHOICES}
+
+
+def budgets_with_spend(user, windows):
+    """
+    The user's budgets (categories joined in), each annotated with
+    ``spent``: its spend counter for the current period window, or None
+    when nothing was spent in it yet.
+    """
+    current_start = Case(
+        *(When(period=period, then=Value(start)) for period, (start, _) in windows.items()),
+        default=Value(windows[Budget.MONTHLY][0]),
+        output_field=DateField(),
+    )
+    spent = BudgetSpend.objects.filter(budget=OuterRef('pk'), period_start=OuterRef('current_start'))
+    return Budget.objects.filter(user=user).select_related('category').annotate(
+        current_start=current_start,
+        spent=Subquery(spent.values('total')[:1]),
+    )
+
+
+def build_status(budgets, windows):
+    """Turn budgets from ``budgets_with_spend`` into budget status rows."""
+    budget_data = []
+    for budget in budgets:
+        start, end = windows.get(budget.period, windows[Budget.MONTHLY])
+        budgeted_amount = to_cents(budget.amount)
+        actual_amount = to_cents(budget.spent)
+        budget_data.append({
+            'category': budget.category.name,
+            'budgeted_amount': budgeted_amount,
+            'actual_amount': actual_amount,
+            'remaining': budgeted_amount - actual_amount,
+            'period': budget.get_period_display(),
+            'period_start': start,
+            'period_end': end,
+        })
+    return budget_data
+
+
+def format_status(rows, amount_format):
+    """Render budget status rows in ``amount_format``."""
+    return [format_amounts(row, STATUS_AMOUNT_FIELDS, amount_format) for row in rows]
+
+
+def evaluate_budgets(user, today=None):
+    """
+    Return budget status rows for ``user`` in the current period windows,
+    with one query regardless of how many budgets the user has.
+    """
+    windows = current_windows(today or timezone.localdate())
+    return build_status(budgets_with_spend(user, windows), windows)
+
+
+async def aevaluate_budgets(user, today=None):
+    """Async variant of ``evaluate_budgets``."""
+    windows = current_windows(today or timezone.localdate())
+    return build_status([budget async for budget in budgets_with_spend(user, windows)], windows)
+
+
+def parse_history_periods(value):
+    """
+    Validate a ``periods`` query param, returning the default when it is
+    missing. Raises ValueError unless it is an integer from 1 to
+    ``MAX_HISTORY_PERIODS``.
+    """
+    if value in (None, ''):
+        return DEFAULT_HISTORY_PERIODS
+    try:
+        periods = int(value)
+    except ValueError:
+        periods = 0
+    if not 1 <= periods <= MAX_HISTORY_PERIODS:
+        raise ValueError(f'periods must be an integer from 1 to {MAX_HISTORY_PERIODS}')
+    return periods
+
+
+def history_windows(period, today, periods):
+    """Return the (start, end) windows of the last ``periods`` periods up to ``today``, oldest first."""
+    windows = [period_window(period, today)]
+    while len(windows) < periods:
+        windows.append(period_window(period, windows[-1][0] - timedelta(days=1)))
+    return windows[::-1]
+
+
+def budget_history(budgets, today, periods):
+    """
+    Return budgeted vs actual rows for the last ``periods`` periods of
+    each budget in ``budgets`` (with categories joined in). Actuals are
+    read from the spend counters with one query for all budgets.
+    """
+    budgets = list(budgets)
+    windows = {budget.period: history_windows(budget.period, today, periods) for budget in budgets}
+    condition = Q()
+    for period, period_windows in windows.items():
+        condition |= Q(
+            budget_id__in=[budget.id for budget in budgets if budget.period == period],
+            period_start__range=(period_windows[0][0], period_windows[-1][0]),
+        )
+    spent = {}
+    if budgets:
+        spent = {
+            (budget_id, start): total
+            for budget_id, start, total in BudgetSpend.objects.filter(condition).values_list(
+                'budget_id', 'period_start', 'total',
+            )
+        }
+
+    rows = []
+    for budget in budgets:
+        budgeted_amount = to_cents(budget.amount)
+        history = []
+        for start, end in windows[budget.period]:
+            actual_amount = to_cents(spent.get((budget.id, start)))
+            history.append({
+                'period_start': start,
+                'period_end': end,
+                'actual_amount': actual_amount,
+                'remaining': budgeted_amount - actual_amount,
+            })
+        rows.append({
+            'id': budget.id,
+            'category': budget.category.name,
+            'period': budget.get_period_display(),
+            'budgeted_amount': budgeted_amount,
+            'history': history,
+        })
+    return rows
+
+
+def format_history(rows, amount_format):
+    """Render budget history rows in ``amount_format``."""
+    return [
+        dict(
+            row,
+            budgeted_amount=format_cents(row['budgeted_amount'], amount_format),
+            history=[format_amounts(entry, HISTORY_AMOUNT_FIELDS, amount_format) for entry in row['history']],
+        )
+        for row in rows
+    ]
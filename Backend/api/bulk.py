@@ -0,0 +1,90 @@
+"""
+Bulk transaction changes
+
+Set-based updates and deletes of many transactions at once. Each call
+locks the selected rows, then issues one UPDATE or DELETE per batch of
+``batch_size`` rows instead of one statement (and one request) per row.
+Because set-based writes send no model signals, the daily rollups and
+budget spend counters are adjusted per key, from the same locked rows the
+write touches, and the owner's summary cache is invalidated here rather
+than in ``api.signals``.
+"""
+from django.db import transaction
+from rest_framework import serializers
+
+from . import budget_spend, rollups, summary_cache
+
+
+def check_types(queryset, changes, categories):
+    """
+    Enforce the rule of ``TransactionSerializer.validate`` on the rows the
+    update would produce: a categorized transaction's type must match its
+    category's type. ``changes`` already passed
+    ``TransactionChangesSerializer``, so a new category and a new type
+    given together agree; this checks each against the selected rows.
+    """
+    category_id = changes.get('category_id')
+    if 'category_id' in changes and category_id is not None and 'type' not in changes:
+        category_type = categories.type_of(category_id)
+        mismatched = queryset.exclude(type=category_type).count()
+        if mismatched:
+            raise serializers.ValidationError({'changes': [
+                f"Transaction type must match category type ({category_type}); "
+                f"{mismatched} selected transactions have another type"
+            ]})
+    elif 'type' in changes and 'category_id' not in changes:
+        mismatched = queryset.filter(category__isnull=False).exclude(category__type=changes['type']).count()
+        if mismatched:
+            raise serializers.ValidationError({'changes': [
+                f"Transaction type ({changes['type']}) must match category type; "
+                f"{mismatched} selected transactions have a category of another type"
+            ]})
+
+
+def locked_batches(queryset, batch_size=500):
+    """
+    Lock the rows of ``queryset`` (``SELECT ... FOR UPDATE``) and return
+    querysets over their ids, ``batch_size`` at a time. Rows changed or
+    added by other writers after the lock are not in any batch, so the
+    rollup adjustments match the rows each batch's write touches.
+    """
+    ids = list(queryset.select_for_update().order_by('pk').values_list('pk', flat=True))
+    rows = queryset.model.objects.using(queryset.db)
+    return [rows.filter(pk__in=ids[start:start + batch_size]) for start in range(0, len(ids), batch_size)]
+
+
+def update_transactions(user, queryset, changes, categories):
+    """
+    Apply ``changes`` to every transaction of ``user`` in ``queryset``,
+    one UPDATE per batch. Raises ValidationError if the result would break
+    the type-matches-category rule. Returns the number of rows updated.
+    """
+    updated = 0
+    with transaction.atomic(using=queryset.db):
+        batches = locked_batches(queryset)
+        check_types(queryset, changes, categories)
+        for batch in batches:
+            rollups.move_transactions(batch, changes)
+            budget_spend.move_transactions(batch, changes)
+            updated += batch.update(**changes)
+        if updated:
+            summary_cache.invalidate(user.id, using=queryset.db)
+    return updated
+
+
+def delete_transactions(user, queryset):
+    """
+    Delete every transaction of ``user`` in ``queryset``, one DELETE per
+    batch. Returns the number of rows deleted.
+    """
+    deleted = 0
+    with transaction.atomic(using=queryset.db):
+        for batch in locked_batches(queryset):
+            rollups.remove_transactions(batch)
+            budget_spend.remove_transactions(batch)
+            # QuerySet.delete() would fetch every row to send post_delete
+            # signals; nothing references transactions, so delete directly.
+            deleted += batch._raw_delete(batch.db)
+        if deleted:
+            summary_cache.invalidate(user.id, using=queryset.db)
+    return deleted
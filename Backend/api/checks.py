@@ -0,0 +1,39 @@
+"""
+System checks
+
+Sessions and the user cache (``api.user_cache``) must live in a cache
+that every worker shares. With a per-process cache, a logout, password
+change or deactivation handled by one worker would not reach the others,
+which would keep serving the old session or user.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHE_BACKENDS = {'django.core.cache.backends.locmem.LocMemCache'}
+CACHED_SESSION_ENGINES = {
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+}
+SHARED_CACHE_HINT = 'Set CACHE_BACKEND and CACHE_LOCATION to a Redis or Memcached cache.'
+
+
+def _is_local(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND') in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and _is_local(settings.SESSION_CACHE_ALIAS):
+        errors.append(Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE} needs a cache shared by all workers.',
+            hint=f'{SHARED_CACHE_HINT} Or use SESSION_ENGINE=django.contrib.sessions.backends.db.',
+            id='api.E001',
+        ))
+    if getattr(settings, 'USER_CACHE_TIMEOUT', 0) and _is_local(getattr(settings, 'USER_CACHE_ALIAS', 'default')):
+        errors.append(Error(
+            'The user cache (USER_CACHE_TIMEOUT) needs a cache shared by all workers.',
+            hint=f'{SHARED_CACHE_HINT} Or set USER_CACHE_TIMEOUT=0.',
+            id='api.E002',
+        ))
+    return errors
@@ -0,0 +1,103 @@
+"""
+Conditional GET
+
+Strong ETags and Last-Modified headers for the read endpoints, derived
+from the per-user data version kept by ``api.summary_cache``, which every
+Category, Transaction or Budget write bumps. The ETag hashes that
+version with everything else the representation depends on (user, full
+path with query string, negotiated media type and, for budget views, the
+current date). A request whose If-None-Match still matches gets a 304
+before the view runs, so no list or aggregate query is issued.
+
+The ETag is the only validator preconditions are evaluated against.
+Last-Modified is sent for information but has one-second resolution, so
+two writes within the same second would share it and If-Modified-Since
+(and If-Unmodified-Since) are ignored.
+
+The state is read once per request and left on the request as
+``data_state``, with its version as ``data_version`` for the view to hand
+to ``summary_cache.get_or_compute``.
+"""
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import summary_cache
+
+
+def _validators(request, user_id, state, vary_on_date):
+    version, modified = state
+    parts = [str(user_id), str(version), request.get_full_path(), getattr(request, 'accepted_media_type', '')]
+    if vary_on_date:
+        # The representation also changes when the day rolls over
+        today = timezone.localdate()
+        parts.append(today.isoformat())
+        modified = max(modified, timezone.make_aware(datetime.combine(today, time.min)).timestamp())
+    digest = hashlib.blake2b('|'.join(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"', int(modified)
+
+
+def _finish(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def respond(request, view, vary_on_date=False):
+    """
+    Answer a GET or HEAD from the authenticated ``request.user`` with 304
+    (or 412) if its preconditions match the user's data version, and
+    otherwise call ``view()`` and add ETag and Last-Modified headers to its
+    response.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return view()
+    user_id = request.user.id
+    state = summary_cache.get_state(user_id)
+    request.data_state = state
+    request.data_version = state[0]
+    etag, last_modified = _validators(request, user_id, state, vary_on_date)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = view()
+    return _finish(response, etag, last_modified)
+
+
+async def arespond(request, user, state, view, vary_on_date=False):
+    """
+    Async variant of ``respond`` for a GET; ``state`` is the user's
+    ``summary_cache.get_state()`` and ``view`` a coroutine function.
+    """
+    etag, last_modified = _validators(request, user.id, state, vary_on_date)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = await view()
+    return _finish(response, etag, last_modified)
+
+
+def conditional(vary_on_date=False):
+    """Decorator applying ``respond`` to a view that takes the request first."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return respond(request, lambda: view(request, *args, **kwargs), vary_on_date)
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """ViewSet mixin that validates ``list`` and ``retrieve`` with ``respond``."""
+
+    def list(self, request, *args, **kwargs):
+        parent = super().list
+        return respond(request, lambda: parent(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        parent = super().retrieve
+        return respond(request, lambda: parent(request, *args, **kwargs))
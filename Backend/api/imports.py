@@ -0,0 +1,132 @@
+"""
+Bulk transaction import
+
+Streams CSV or JSON-lines request bodies into ``Transaction`` rows.
+Rows are parsed one line at a time, validated with
+``TransactionImportSerializer`` and inserted with ``bulk_create`` in
+fixed-size batches, so memory use depends on the batch size rather than
+the upload size. Invalid rows are reported back without aborting the rest
+of the import.
+"""
+import codecs
+import csv
+import json
+
+from django.db import transaction
+
+from . import budget_spend, rollups, shards, summary_cache
+from .models import Category, Transaction
+from .serializers import TransactionImportSerializer
+
+
+class CategoryCache:
+    """
+    Per-request lookup of the importing user's categories. Each distinct
+    id or (name, type) pair is fetched from the database at most once.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.types_by_id = {}
+        self.ids_by_name = {}
+
+    def type_of(self, category_id):
+        """Return the category's type, or None if the user has no such category."""
+        if category_id not in self.types_by_id:
+            self.types_by_id[category_id] = Category.objects.filter(
+                user=self.user, id=category_id,
+            ).values_list('type', flat=True).first()
+        return self.types_by_id[category_id]
+
+    def id_for(self, name, category_type):
+        """Return the id of the user's category with this name and type, or None."""
+        key = (name, category_type)
+        if key not in self.ids_by_name:
+            category_id = Category.objects.filter(
+                user=self.user, name=name, type=category_type,
+            ).values_list('id', flat=True).first()
+            self.ids_by_name[key] = category_id
+            if category_id is not None:
+                self.types_by_id[category_id] = category_type
+        return self.ids_by_name[key]
+
+
+def _decoded_lines(stream):
+    """Yield text lines from a binary request stream, dropping any UTF-8 BOM."""
+    if stream is None:
+        return iter(())
+    return codecs.iterdecode(iter(stream.readline, b''), 'utf-8-sig')
+
+
+def parse_csv(stream):
+    """Yield ``(line_number, row, error)`` for each CSV record after the header."""
+    reader = csv.DictReader(_decoded_lines(stream))
+    try:
+        for row in reader:
+            yield reader.line_num, {
+                key: value for key, value in row.items()
+                if key is not None and value not in ('', None)
+            }, None
+    except (csv.Error, UnicodeDecodeError) as exc:
+        yield reader.line_num, None, str(exc)
+
+
+def parse_json_lines(stream):
+    """Yield ``(line_number, row, error)`` for each non-blank JSON line."""
+    try:
+        for line_number, line in enumerate(_decoded_lines(stream), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, None, f'Invalid JSON: {exc}'
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, 'Each line must be a JSON object'
+                continue
+            yield line_number, row, None
+    except UnicodeDecodeError as exc:
+        yield None, None, str(exc)
+
+
+def import_transactions(user, rows, batch_size=500, max_errors=100):
+    """
+    Validate and insert parsed ``rows`` for ``user``.
+
+    Returns a summary dict with the number of created and failed rows and
+    up to ``max_errors`` per-row error details.
+    """
+    categories = CategoryCache(user)
+    result = {'created': 0, 'failed': 0, 'errors': []}
+    batch = []
+
+    def fail(line_number, errors):
+        result['failed'] += 1
+        if len(result['errors']) < max_errors:
+            result['errors'].append({'line': line_number, 'errors': errors})
+
+    def flush():
+        with transaction.atomic(using=shards.data_db()):
+            created = Transaction.objects.bulk_create(batch)
+            rollups.add_transactions(created)
+            budget_spend.add_transactions(created)
+            # bulk_create sends no post_save signals
+            summary_cache.invalidate(user.id)
+        result['created'] += len(batch)
+        batch.clear()
+
+    for line_number, row, error in rows:
+        if error is not None:
+            fail(line_number, {'non_field_errors': [error]})
+            continue
+        serializer = TransactionImportSerializer(data=row, context={'categories': categories})
+        if not serializer.is_valid():
+            fail(line_number, serializer.errors)
+            continue
+        batch.append(Transaction(user=user, **serializer.validated_data))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
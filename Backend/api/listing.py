@@ -0,0 +1,111 @@
+"""
+Lean list rows
+
+Read-only list path for the category, transaction and budget viewsets.
+Rows are fetched with ``.values()`` and turned into plain dicts by a
+fixed column table instead of running ``ModelSerializer`` field
+machinery per row. Each column table produces exactly the keys, order
+and value formatting of the matching serializer, so list responses are
+byte-for-byte the same as the serializer path
+(``python manage.py benchmark_serialization`` checks this).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.utils import timezone
+from rest_framework.response import Response
+
+_CENT = Decimal('0.01')
+
+
+def format_decimal(value):
+    """Format a two-place amount like DRF's DecimalField (COERCE_DECIMAL_TO_STRING)."""
+    return f'{value.quantize(_CENT, rounding=ROUND_HALF_UP):f}'
+
+
+def format_date(value):
+    return value.isoformat()
+
+
+def format_datetime(value):
+    """Format a datetime like DRF's DateTimeField: current time zone, UTC written as 'Z'."""
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+# (key, values() source, formatter or None, omitted when None). DRF leaves
+# out read-only dotted-source fields such as category.name when the
+# relation is null, hence the last flag.
+
+# Same keys, in the same order, as CategorySerializer
+CATEGORY_COLUMNS = (
+    ('id', 'id', None, False),
+    ('user', 'user_id', None, False),
+    ('name', 'name', None, False),
+    ('type', 'type', None, False),
+    ('created_at', 'created_at', format_datetime, False),
+)
+
+# Same keys, in the same order, as TransactionSerializer
+TRANSACTION_COLUMNS = (
+    ('id', 'id', None, False),
+    ('user', 'user_id', None, False),
+    ('category', 'category_id', None, False),
+    ('category_name', 'category__name', None, True),
+    ('amount', 'amount', format_decimal, False),
+    ('description', 'description', None, False),
+    ('date', 'date', format_date, False),
+    ('type', 'type', None, False),
+    ('created_at', 'created_at', format_datetime, False),
+)
+
+# Same keys, in the same order, as BudgetSerializer
+BUDGET_COLUMNS = (
+    ('id', 'id', None, False),
+    ('user', 'user_id', None, False),
+    ('category', 'category_id', None, False),
+    ('category_name', 'category__name', None, True),
+    ('category_type', 'category__type', None, True),
+    ('amount', 'amount', format_decimal, False),
+    ('period', 'period', None, False),
+    ('start_date', 'start_date', format_date, False),
+    ('created_at', 'created_at', format_datetime, False),
+)
+
+
+def values_queryset(queryset, columns):
+    """Return ``queryset`` as a ``.values()`` queryset with the sources of ``columns``."""
+    return queryset.values(*(source for _, source, _, _ in columns))
+
+
+def build_rows(rows, columns):
+    """Turn ``.values()`` dicts into response rows described by ``columns``."""
+    result = []
+    for values in rows:
+        row = {}
+        for key, source, formatter, optional in columns:
+            value = values[source]
+            if value is None:
+                if not optional:
+                    row[key] = None
+            else:
+                row[key] = formatter(value) if formatter else value
+        result.append(row)
+    return result
+
+
+class LeanListMixin:
+    """
+    ViewSet mixin that serves ``list`` from ``.values()`` rows described by
+    ``list_columns``. Filtering and pagination are unchanged; every other
+    action still goes through the serializer.
+    """
+    list_columns = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = values_queryset(self.filter_queryset(self.get_queryset()), self.list_columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(build_rows(page, self.list_columns))
+        return Response(build_rows(queryset, self.list_columns))
@@ -0,0 +1,41 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import archive, shards
+from api.models import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Move transactions dated before the retention window (TRANSACTION_RETENTION_DAYS) '
+        'to the archive table. Summaries are unaffected.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only process this user id (repeatable). Defaults to all users.',
+        )
+        parser.add_argument('--before', help='Archive transactions dated before this YYYY-MM-DD date instead.')
+        parser.add_argument('--dry-run', action='store_true', help='Count the transactions without moving them.')
+
+    def handle(self, *args, **options):
+        try:
+            before = date.fromisoformat(options['before']) if options['before'] else archive.cutoff()
+        except ValueError:
+            raise CommandError('--before must be a YYYY-MM-DD date.')
+        user_ids = options['user_ids']
+
+        moved = 0
+        for database in shards.data_databases():
+            with shards.pinned(database):
+                if options['dry_run']:
+                    transactions = Transaction.objects.filter(date__lt=before)
+                    if user_ids is not None:
+                        transactions = transactions.filter(user_id__in=user_ids)
+                    moved += transactions.count()
+                else:
+                    moved += archive.archive(user_ids, before)
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {moved} transactions dated before {before}.'))
@@ -0,0 +1,99 @@
+import json
+import platform
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from api import bench
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every api route through the Django test client and, optionally, '
+        'a local gunicorn server. Seeds synthetic data into the configured database '
+        '(point DB_NAME at a scratch file) and writes machine-readable results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--budgets', type=int, default=5)
+        parser.add_argument('--transactions', type=int, default=10000, help='Transactions per user.')
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse previously seeded users.')
+        parser.add_argument('--iterations', type=int, default=50, help='Requests per route.')
+        parser.add_argument('--gunicorn', action='store_true', help='Also benchmark over HTTP against gunicorn.')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent HTTP clients.')
+        parser.add_argument('--output', default='benchmark-results.json')
+        parser.add_argument('--baseline', help='Results file to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed fractional p50 slowdown before a route counts as regressed.')
+
+    def handle(self, *args, **options):
+        if options['skip_seed']:
+            user = User.objects.filter(username__startswith=f"{options['prefix']}-").first()
+            if user is None:
+                raise CommandError('No seeded users found; run without --skip-seed first.')
+        else:
+            user = bench.seed(
+                users=options['users'], categories=options['categories'], budgets=options['budgets'],
+                transactions=options['transactions'], prefix=options['prefix'], stdout=self.stdout,
+            )[0]
+
+        for name in bench.uncovered_routes():
+            self.stderr.write(self.style.WARNING(f'Route {name!r} has no benchmark scenario'))
+
+        results = {}
+        setup_test_environment()
+        try:
+            results['client'] = bench.run_client(user, options['iterations'])
+        finally:
+            teardown_test_environment()
+        self.report('client', results['client'])
+
+        if options['gunicorn']:
+            port = bench.free_port()
+            server = bench.start_gunicorn(port, options['workers'])
+            try:
+                results['gunicorn'] = bench.run_http(user, port, options['iterations'], options['concurrency'])
+            finally:
+                server.terminate()
+                server.wait()
+            self.report('gunicorn', results['gunicorn'])
+
+        with open(options['output'], 'w') as output:
+            json.dump({
+                'meta': {
+                    'timestamp': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'options': {key: options[key] for key in (
+                        'users', 'categories', 'budgets', 'transactions',
+                        'iterations', 'workers', 'concurrency',
+                    )},
+                },
+                'results': results,
+            }, output, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)['results']
+            regressions = bench.compare(results, baseline, options['tolerance'])
+            for regression in regressions:
+                self.stderr.write(self.style.ERROR(regression))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def report(self, driver, results):
+        self.stdout.write(self.style.MIGRATE_HEADING(driver))
+        for name, stats in results.items():
+            queries = stats.get('queries_per_request')
+            self.stdout.write(
+                f"  {name:<30} {stats['requests_per_sec']:>9} req/s  "
+                f"p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms"
+                + (f'  {queries} queries' if queries is not None else '')
+            )
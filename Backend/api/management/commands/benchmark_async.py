@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api import bench
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync summary endpoints under gunicorn sync workers with their '
+        'async variants under gunicorn + uvicorn workers at high concurrency. '
+        'Seeds synthetic data into the configured database (point DB_NAME at a scratch file).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', type=int, default=50000, help='Transactions for the seeded user.')
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse previously seeded users.')
+        parser.add_argument('--iterations', type=int, default=500, help='Requests per route.')
+        parser.add_argument('--concurrency', type=int, default=64, help='Concurrent HTTP clients.')
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes per server.')
+
+    def handle(self, *args, **options):
+        if options['skip_seed']:
+            user = User.objects.filter(username__startswith=f"{options['prefix']}-").first()
+            if user is None:
+                raise CommandError('No seeded users found; run without --skip-seed first.')
+        else:
+            user = bench.seed(transactions=options['transactions'], prefix=options['prefix'], stdout=self.stdout)[0]
+
+        runs = [
+            ('sync (WSGI, sync workers)', 'dotproduct_backend.wsgi:application', None, bench.SYNC_SUMMARY_ROUTES),
+            ('async (ASGI, uvicorn workers)', 'dotproduct_backend.asgi:application',
+             'uvicorn.workers.UvicornWorker', bench.ASYNC_SUMMARY_ROUTES),
+        ]
+        for label, app, worker_class, routes in runs:
+            port = bench.free_port()
+            server = bench.start_gunicorn(port, options['workers'], app=app, worker_class=worker_class)
+            try:
+                results = bench.run_http(user, port, options['iterations'], options['concurrency'], routes)
+            finally:
+                server.terminate()
+                server.wait()
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label}, concurrency {options['concurrency']}"))
+            for name, stats in results.items():
+                self.stdout.write(
+                    f"  {name:<20} {stats['requests_per_sec']:>9} req/s  "
+                    f"p50 {stats['p50_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms"
+                )
+        if settings.SUMMARY_CACHE_TIMEOUT:
+            self.stdout.write(
+                'Note: summary caching was on, so most requests after warm-up were cache '
+                'hits; run with SUMMARY_CACHE_TIMEOUT=0 to compare database-bound throughput.'
+            )
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from api import bench
+
+# (label, SESSION_ENGINE, USER_CACHE_TIMEOUT). The benchmark runs in one
+# process, so the local-memory cache is fine for the cached configurations.
+CONFIGURATIONS = [
+    ('db sessions, no user cache', 'django.contrib.sessions.backends.db', 0),
+    ('cached_db sessions + user cache', 'django.contrib.sessions.backends.cached_db', 60),
+    ('signed_cookies sessions + user cache', 'django.contrib.sessions.backends.signed_cookies', 60),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the per-request cost of session authentication: queries and latency of an '
+        'authenticated GET with database sessions and no user cache, compared with cached '
+        'sessions plus the user cache. Run against a scratch database (set DB_NAME/DB_ENGINE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/auth/user/', help='Authenticated GET to measure.')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--prefix', default='bench')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username__startswith=f"{options['prefix']}-").first()
+        if user is None:
+            user = bench.seed(categories=2, budgets=1, transactions=10, prefix=options['prefix'])[0]
+
+        setup_test_environment()
+        try:
+            for label, engine, timeout in CONFIGURATIONS:
+                with override_settings(SESSION_ENGINE=engine, USER_CACHE_TIMEOUT=timeout, THROTTLE_ENABLED=False):
+                    queries, samples = self.measure(user, options['path'], options['iterations'])
+                stats = bench.summarize(samples)
+                self.stdout.write(
+                    f"{label:<40} {queries:>5} queries/request  "
+                    f"p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms"
+                )
+        finally:
+            teardown_test_environment()
+
+    def measure(self, user, path, iterations):
+        # A new client per configuration: the session middleware binds its
+        # engine when the client's handler first loads the middleware.
+        client = Client()
+        client.force_login(user)
+        client.get(path)  # warm the session and user caches
+        queries, samples = [], []
+        for _ in range(iterations):
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(path)
+                samples.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'GET {path} returned {response.status_code}')
+            queries.append(len(captured.captured_queries))
+        return round(statistics.fmean(queries), 2), samples
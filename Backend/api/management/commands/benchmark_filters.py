@@ -0,0 +1,72 @@
+from itertools import combinations
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api import bench, shards
+from api.models import Transaction
+
+FILTERS = ('type', 'category', 'date_range')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic transactions and report EXPLAIN plans and p50/p99 latency '
+        'for every TransactionViewSet filter combination. Seeding keeps the rollups, '
+        'budget spend counters and snapshots in step with the inserted rows. Run '
+        'against a scratch database (set DB_NAME/DB_ENGINE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--transactions', type=int, default=1_000_000,
+                            help='Transactions per user.')
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--skip-seed', action='store_true',
+                            help='Reuse previously seeded users.')
+        parser.add_argument('--no-explain', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['skip_seed']:
+            user = User.objects.filter(username__startswith=f"{options['prefix']}-").first()
+            if user is None:
+                raise CommandError('No seeded users found; run without --skip-seed first.')
+        else:
+            user = bench.seed(
+                users=options['users'], categories=options['categories'],
+                transactions=options['transactions'], prefix=options['prefix'],
+                stdout=self.stdout,
+            )[0]
+
+        with shards.pinned(shards.placement(user.pk).database):
+            self.report(user, options)
+
+    def report(self, user, options):
+        category = user.categories.filter(type=Transaction.EXPENSE).first()
+        newest = Transaction.objects.filter(user=user).order_by('-date').values_list('date', flat=True).first()
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+
+        for size in range(len(FILTERS) + 1):
+            for combo in combinations(FILTERS, size):
+                queryset = Transaction.objects.filter(user=user)
+                if 'type' in combo:
+                    queryset = queryset.filter(type=Transaction.EXPENSE)
+                if 'category' in combo:
+                    queryset = queryset.filter(category=category)
+                if 'date_range' in combo and newest:
+                    queryset = queryset.filter(date__gte=newest.replace(day=1), date__lte=newest)
+
+                def first_page():
+                    queryset.count()
+                    list(queryset[:page_size])
+
+                stats = bench.summarize(bench.time_calls(first_page, options['iterations']))
+                label = '+'.join(combo) or 'user only'
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"{label}: p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms"
+                ))
+                if not options['no_explain']:
+                    self.stdout.write(queryset[:page_size].explain())
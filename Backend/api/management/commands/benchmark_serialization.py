@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api import bench
+from api.listing import BUDGET_COLUMNS, CATEGORY_COLUMNS, TRANSACTION_COLUMNS, build_rows, values_queryset
+from api.models import Budget, Category, Transaction
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import BudgetSerializer, CategorySerializer, TransactionSerializer
+from api.views import BUDGET_FIELDS, TRANSACTION_FIELDS
+
+# (name, model, serializer, lean columns, select_related/only used by the serializer path)
+LISTS = [
+    ('categories', Category, CategorySerializer, CATEGORY_COLUMNS, None),
+    ('transactions', Transaction, TransactionSerializer, TRANSACTION_COLUMNS, TRANSACTION_FIELDS),
+    ('budgets', Budget, BudgetSerializer, BUDGET_COLUMNS, BUDGET_FIELDS),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare list serialization cost of the ModelSerializer + JSONRenderer path with '
+        'the lean .values() rows + FastJSONRenderer path, per 1k rows, and check that both '
+        'produce identical bytes. Run against a scratch database (set DB_NAME/DB_ENGINE).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per model.')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--prefix', default='serialization')
+        parser.add_argument('--skip-seed', action='store_true',
+                            help='Reuse a previously seeded user.')
+
+    def handle(self, *args, **options):
+        if options['skip_seed']:
+            user = User.objects.filter(username__startswith=f"{options['prefix']}-").first()
+            if user is None:
+                raise CommandError('No seeded user found; run without --skip-seed first.')
+        else:
+            rows = options['rows']
+            user = bench.seed(
+                categories=rows, budgets=rows, transactions=rows,
+                prefix=options['prefix'], stdout=self.stdout,
+            )[0]
+
+        if orjson is None:
+            self.stdout.write('orjson is not installed; FastJSONRenderer uses the stdlib encoder.')
+        iterations = options['iterations']
+        failures = []
+        for name, model, serializer_class, columns, only in LISTS:
+            queryset = model.objects.filter(user=user)[:options['rows']]
+            if only:
+                queryset = model.objects.filter(user=user).select_related('category').only(*only)[:options['rows']]
+            lean_queryset = values_queryset(model.objects.filter(user=user), columns)[:options['rows']]
+            instances = list(queryset)
+            values = list(lean_queryset)
+            count = len(instances)
+            if not count:
+                raise CommandError(f'No {name} to serialize for {user.username}.')
+
+            def serializer_render(instances=instances, serializer_class=serializer_class):
+                return JSONRenderer().render(serializer_class(instances, many=True).data)
+
+            def lean_render(values=values, columns=columns):
+                return FastJSONRenderer().render(build_rows(values, columns))
+
+            def serializer_end_to_end(queryset=queryset, serializer_class=serializer_class):
+                return JSONRenderer().render(serializer_class(list(queryset.all()), many=True).data)
+
+            def lean_end_to_end(lean_queryset=lean_queryset, columns=columns):
+                return FastJSONRenderer().render(build_rows(list(lean_queryset.all()), columns))
+
+            if serializer_render() != lean_render():
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: lean output differs from the serializer output'))
+
+            self.stdout.write(f'{name} ({count} rows), ms per 1k rows:')
+            for label, func in (
+                ('serializer + JSONRenderer', serializer_render),
+                ('lean rows + FastJSONRenderer', lean_render),
+                ('query + serializer + JSONRenderer', serializer_end_to_end),
+                ('query + lean rows + FastJSONRenderer', lean_end_to_end),
+            ):
+                stats = bench.summarize([
+                    sample * 1000 / count for sample in bench.time_calls(func, iterations)
+                ])
+                self.stdout.write(f"  {label:<40} p50 {stats['p50_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms")
+
+        if failures:
+            raise CommandError(f'Lean list output differs for: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Lean list output matches the serializers byte for byte.'))
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api import shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Move users' financial rows between databases while the site is running. "
+        'With --user and --to, move those users. Otherwise move users still on the '
+        'default database to their home shard, then even out transaction counts '
+        'across the shards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Move this user id (repeatable); requires --to.',
+        )
+        parser.add_argument('--to', dest='target', help='Database alias to move the --user users to.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.1,
+            help='Stop balancing once every shard is within this fraction of the mean load (default 0.1).',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Users moved per batch; their writes are refused until the batch is done (default 100).',
+        )
+        parser.add_argument(
+            '--grace', type=float,
+            help='Seconds to wait for in-flight requests (default SHARD_MOVE_GRACE_SECONDS).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Print the planned moves without moving anything.')
+
+    def handle(self, *args, **options):
+        if not shards.enabled():
+            raise CommandError('No shards are configured; set DB_SHARDS.')
+
+        if options['user_ids']:
+            target = options['target']
+            if target not in shards.data_databases():
+                raise CommandError(f'--to must be one of: {", ".join(shards.data_databases())}')
+            moves = {user_id: target for user_id in options['user_ids']}
+        elif options['target']:
+            raise CommandError('--to requires --user.')
+        else:
+            moves = self.plan(options['tolerance'])
+
+        if not moves:
+            self.stdout.write(self.style.SUCCESS('Shards are balanced; nothing to move.'))
+            return
+        for user_id, target in moves.items():
+            self.stdout.write(f'User {user_id}: {shards.load_placement(user_id).database} -> {target}')
+        if options['dry_run']:
+            return
+
+        pending = list(moves.items())
+        moved = 0
+        for start in range(0, len(pending), options['batch']):
+            batch = dict(pending[start:start + options['batch']])
+            done = shards.move_users(batch, grace=options['grace'], log=self.stdout.write)
+            moved += len(done)
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} users.'))
+
+    def plan(self, tolerance):
+        """
+        Users without a placement go to their home shard; then the largest
+        user that narrows the gap moves from the busiest shard to the
+        least busy one until the shards are within ``tolerance`` of the mean.
+        """
+        moves = {}
+        sizes = {database: shards.user_sizes(database) for database in settings.SHARD_DATABASES}
+        legacy_sizes = shards.user_sizes(DEFAULT_DB_ALIAS)
+        unplaced = User.objects.using(DEFAULT_DB_ALIAS).filter(
+            shard_placement__isnull=True,
+        ).values_list('pk', flat=True)
+        for user_id in unplaced.iterator():
+            target = shards.home_shard(user_id)
+            moves[user_id] = target
+            sizes[target][user_id] = legacy_sizes.get(user_id, 0)
+
+        loads = {database: sum(users.values()) for database, users in sizes.items()}
+        mean = sum(loads.values()) / len(loads)
+        for _ in range(sum(len(users) for users in sizes.values())):
+            busiest = max(loads, key=loads.get)
+            idlest = min(loads, key=loads.get)
+            gap = loads[busiest] - loads[idlest]
+            if gap <= tolerance * mean:
+                break
+            # Moving a user of size s leaves a gap of |gap - 2s|
+            candidates = [(user_id, size) for user_id, size in sizes[busiest].items() if 0 < size < gap]
+            if not candidates:
+                break
+            user_id, size = min(candidates, key=lambda candidate: abs(gap - 2 * candidate[1]))
+            del sizes[busiest][user_id]
+            sizes[idlest][user_id] = size
+            loads[busiest] -= size
+            loads[idlest] += size
+            moves[user_id] = idlest
+        return moves
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import rollups, shards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily rollups from raw transactions, or verify them with --verify.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only process this user id (repeatable). Defaults to all users.',
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Compare rollups with raw transactions without writing anything.',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+
+        if options['verify']:
+            mismatches = []
+            for database in shards.data_databases():
+                with shards.pinned(database):
+                    mismatches += rollups.verify(user_ids)
+            for key, expected, actual in mismatches[:50]:
+                self.stderr.write(f'{key}: expected {expected}, found {actual}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} rollup rows do not match raw transactions.')
+            self.stdout.write(self.style.SUCCESS('Rollups match raw transactions.'))
+            return
+
+        written = 0
+        for database in shards.data_databases():
+            with shards.pinned(database):
+                written += rollups.rebuild(user_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} rollup rows.'))
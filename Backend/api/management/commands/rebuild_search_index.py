@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import search, shards
+
+
+class Command(BaseCommand):
+    help = (
+        'Recreate the transaction description search index (SQLite FTS5 table and '
+        'triggers, or the PostgreSQL GIN index) and refill it from the transactions, '
+        'on the default database and every shard.'
+    )
+
+    def handle(self, *args, **options):
+        for database in shards.data_databases():
+            connection = connections[database]
+            with connection.schema_editor() as schema_editor:
+                search.install(schema_editor)
+            if search.backend(connection.alias) is None:
+                self.stdout.write(f'No text index is available on {database} ({connection.vendor}); search uses icontains.')
+                continue
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt the transaction search index on {database} ({connection.vendor}).'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import budget_spend, shards
+
+
+class Command(BaseCommand):
+    help = 'Verify budget spend counters against raw transaction sums, or rebuild them with --fix.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only process this user id (repeatable). Defaults to all users.',
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Rebuild the counters from raw transactions instead of only reporting mismatches.',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+
+        if options['fix']:
+            written = 0
+            for database in shards.data_databases():
+                with shards.pinned(database):
+                    written += budget_spend.rebuild(user_ids)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} budget spend counters.'))
+            return
+
+        mismatches = []
+        for database in shards.data_databases():
+            with shards.pinned(database):
+                mismatches += budget_spend.verify(user_ids)
+        for key, expected, actual in mismatches[:50]:
+            self.stderr.write(f'{key}: expected {expected}, found {actual}')
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} budget spend counters do not match raw transactions.')
+        self.stdout.write(self.style.SUCCESS('Budget spend counters match raw transactions.'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import shards, snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Take the closing-balance snapshots of every month that has ended, continuing '
+        'from each user\'s latest snapshot. Run it after each month closes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Only process this user id (repeatable). Defaults to all users.',
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Drop the existing snapshots and take them again from the first month.',
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Compare each user's latest snapshot with the rollups without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+
+        if options['verify']:
+            mismatches = []
+            for database in shards.data_databases():
+                with shards.pinned(database):
+                    mismatches += snapshots.verify(user_ids)
+            for key, expected, actual in mismatches[:50]:
+                self.stderr.write(f'{key}: expected {expected}, found {actual}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} snapshot rows do not match the rollups.')
+            self.stdout.write(self.style.SUCCESS('Balance snapshots match the rollups.'))
+            return
+
+        written = 0
+        for database in shards.data_databases():
+            with shards.pinned(database):
+                if options['rebuild']:
+                    snapshots.clear(user_ids)
+                written += snapshots.take(user_ids)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} balance snapshot rows.'))
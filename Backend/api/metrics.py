@@ -0,0 +1,83 @@
+"""
+Request metrics
+
+In-process aggregation of per-view request metrics recorded by
+``api.middleware.RequestMetricsMiddleware``. Each view keeps request
+counts, totals and fixed-bucket histograms for wall time, SQL time,
+render time and query count. Recording takes one lock acquisition and a
+few integer increments, so it is cheap enough to leave on.
+
+Metrics are per process; with several workers, each reports its own.
+"""
+import threading
+from bisect import bisect_left
+
+# Upper bounds (inclusive) of the histogram buckets; a final +Inf bucket
+# catches everything larger.
+TIME_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+_views = {}
+
+
+class _Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def as_dict(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {'sum': round(self.total, 3), 'buckets': dict(zip(labels, self.counts))}
+
+
+class _ViewMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = _Histogram(TIME_BUCKETS_MS)
+        self.sql_ms = _Histogram(TIME_BUCKETS_MS)
+        self.render_ms = _Histogram(TIME_BUCKETS_MS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+
+
+def record(view, status_code, total_ms, sql_ms, render_ms, queries):
+    """Add one request's measurements to the histograms of ``view``."""
+    with _lock:
+        metrics = _views.get(view)
+        if metrics is None:
+            metrics = _views[view] = _ViewMetrics()
+        metrics.requests += 1
+        if status_code >= 500:
+            metrics.errors += 1
+        metrics.total_ms.observe(total_ms)
+        metrics.sql_ms.observe(sql_ms)
+        metrics.render_ms.observe(render_ms)
+        metrics.queries.observe(queries)
+
+
+def snapshot():
+    """Return all recorded metrics as plain dicts, keyed by view."""
+    with _lock:
+        return {
+            view: {
+                'requests': metrics.requests,
+                'errors': metrics.errors,
+                'total_ms': metrics.total_ms.as_dict(),
+                'sql_ms': metrics.sql_ms.as_dict(),
+                'render_ms': metrics.render_ms.as_dict(),
+                'queries': metrics.queries.as_dict(),
+            }
+            for view, metrics in sorted(_views.items())
+        }
+
+
+def reset():
+    """Forget all recorded metrics."""
+    with _lock:
+        _views.clear()
@@ -0,0 +1,167 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics, shards
+
+logger = logging.getLogger('api.metrics')
+
+
+class _QueryTimer:
+    """``execute_wrapper`` that counts queries and their total duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+_timer = ContextVar('request_metrics_timer', default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    """``execute_wrapper`` installed on every connection; times queries made within a request."""
+    timer = _timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def _install_timer(connection, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records SQL query count, SQL time, response render (serialization)
+    time and total wall time for every request.
+
+    The numbers are sent back in a ``Server-Timing`` header, logged as one
+    JSON line on the ``api.metrics`` logger and aggregated per view in
+    ``api.metrics`` (served to admins at ``/api/metrics/``). Disable with
+    ``REQUEST_METRICS_ENABLED = False``.
+
+    Connections are per thread, and under ASGI the ORM runs in
+    ``sync_to_async`` worker threads, so every connection gets a wrapper
+    when it connects and the request's timer is found through a context
+    variable, which those threads inherit.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install_timer, dispatch_uid='request-metrics-timer')
+        # Connections opened before this middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            _install_timer(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, started = self._start(request)
+        token = _timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        timer, started = self._start(request)
+        token = _timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    @staticmethod
+    def _start(request):
+        request._metrics_render = [0.0, 0.0]
+        return _QueryTimer(), time.perf_counter()
+
+    def _finish(self, request, response, timer, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        render_start, render_end = request._metrics_render
+        render_ms = (render_end - render_start) * 1000 if render_end else 0.0
+        sql_ms = timer.seconds * 1000
+        match = request.resolver_match
+        view = f'{request.method} {match.view_name if match else "unresolved"}'
+
+        response['Server-Timing'] = (
+            f'db;dur={sql_ms:.2f};desc="{timer.count} queries", '
+            f'render;dur={render_ms:.2f}, total;dur={total_ms:.2f}'
+        )
+        metrics.record(view, response.status_code, total_ms, sql_ms, render_ms, timer.count)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'view': view,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': timer.count,
+                'sql_ms': round(sql_ms, 2),
+                'render_ms': round(render_ms, 2),
+                'total_ms': round(total_ms, 2),
+            }))
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        marks = request._metrics_render
+        marks[0] = time.perf_counter()
+
+        def rendered(response):
+            marks[1] = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class ShardContextMiddleware:
+    """
+    Binds the request for ``api.shards.ShardRouter``, which sends queries
+    on the sharded models to the shard of ``request.user`` (resolved
+    lazily, so DRF's authentication has run by then). Unused unless
+    ``SHARD_DATABASES`` is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not shards.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with shards.bound_request(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with shards.bound_request(request):
+            return await self.get_response(request)
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:02
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+import django.db.models.deletion
+
+
+def backfill_budget_spend(apps, schema_editor):
+    Budget = apps.get_model('api', 'Budget')
+    Transaction = apps.get_model('api', 'Transaction')
+    BudgetSpend = apps.get_model('api', 'BudgetSpend')
+    truncs = {'weekly': TruncWeek, 'monthly': TruncMonth, 'yearly': TruncYear}
+    rows = []
+    for budget in Budget.objects.only('id', 'user_id', 'category_id', 'period').iterator():
+        spend = Transaction.objects.filter(user_id=budget.user_id, category_id=budget.category_id).annotate(
+            period_start=truncs.get(budget.period, TruncMonth)('date'),
+        ).values('period_start').annotate(total=models.Sum('amount'), count=models.Count('id')).order_by()
+        rows.extend(BudgetSpend(budget_id=budget.id, **row) for row in spend)
+    BudgetSpend.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_transaction_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetSpend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spend', to='api.budget')),
+            ],
+            options={
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='budgetspend',
+            constraint=models.UniqueConstraint(fields=('budget', 'period_start'), name='unique_budget_spend'),
+        ),
+        migrations.RunPython(backfill_budget_spend, migrations.RunPython.noop),
+    ]
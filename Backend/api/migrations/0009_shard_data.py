@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:05
+
+from importlib import import_module
+
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+search_index = import_module('api.migrations.0004_transaction_search')
+
+# The data steps of 0002, 0004, 0005 and 0006 run on ``default`` only (see
+# ShardRouter.allow_migrate); these repeat them on the database being
+# migrated, so each shard gets its own rollups, spend counters and search
+# index.
+SHARD_AWARE = {'shard_aware': True}
+
+
+def backfill_rollups(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Transaction = apps.get_model('api', 'Transaction')
+    DailyRollup = apps.get_model('api', 'DailyRollup')
+    if DailyRollup.objects.using(db_alias).exists():
+        return
+    rows = Transaction.objects.using(db_alias).values('user_id', 'date', 'category_id', 'type').annotate(
+        total=models.Sum('amount'), count=models.Count('id'),
+    ).order_by()
+    DailyRollup.objects.using(db_alias).bulk_create(
+        (DailyRollup(**row) for row in rows.iterator(chunk_size=2000)),
+        batch_size=2000,
+    )
+
+
+def backfill_budget_spend(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    Budget = apps.get_model('api', 'Budget')
+    Transaction = apps.get_model('api', 'Transaction')
+    BudgetSpend = apps.get_model('api', 'BudgetSpend')
+    if BudgetSpend.objects.using(db_alias).exists():
+        return
+    truncs = {'weekly': TruncWeek, 'monthly': TruncMonth, 'yearly': TruncYear}
+    rows = []
+    for budget in Budget.objects.using(db_alias).only('id', 'user_id', 'category_id', 'period').iterator():
+        spend = Transaction.objects.using(db_alias).filter(
+            user_id=budget.user_id, category_id=budget.category_id,
+        ).annotate(
+            period_start=truncs.get(budget.period, TruncMonth)('date'),
+        ).values('period_start').annotate(total=models.Sum('amount'), count=models.Count('id')).order_by()
+        rows.extend(BudgetSpend(budget_id=budget.id, **row) for row in spend)
+    BudgetSpend.objects.using(db_alias).bulk_create(rows, batch_size=2000)
+
+
+def install_search_index(apps, schema_editor):
+    if schema_editor.connection.alias == DEFAULT_DB_ALIAS:
+        # Installed by 0004 and 0006
+        return
+    search_index.install_search_index(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop, hints=SHARD_AWARE),
+        migrations.RunPython(backfill_budget_spend, migrations.RunPython.noop, hints=SHARD_AWARE),
+        migrations.RunPython(install_search_index, migrations.RunPython.noop, hints=SHARD_AWARE),
+    ]
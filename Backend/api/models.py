@@ -11,7 +11,9 @@ class Category(models.Model):
         (EXPENSE, 'Expense'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories')
+    # No database constraints on user: with sharding (api.shards) users live
+    # on another database than their financial rows.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories', db_constraint=False)
     name = models.CharField(max_length=100)
     type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -34,7 +36,7 @@ class Transaction(models.Model):
         (EXPENSE, 'Expense'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions', db_constraint=False)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='transactions')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True)
@@ -44,6 +46,13 @@ class Transaction(models.Model):
     
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Default listing order and date-range filters per user
+            models.Index(fields=['user', '-date', '-created_at'], name='txn_user_date_idx'),
+            # TransactionViewSet type and category filters, optionally with a date range
+            models.Index(fields=['user', 'type', 'date'], name='txn_user_type_date_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='txn_user_category_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_type_display()}: ${self.amount} - {self.category.name if self.category else 'Uncategorized'} on {self.date}"
@@ -60,7 +69,7 @@ class Budget(models.Model):
         (YEARLY, 'Yearly'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets', db_constraint=False)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='budgets')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     period = models.CharField(max_length=10, choices=PERIOD_CHOICES, default=MONTHLY)
@@ -73,3 +82,163 @@ class Budget(models.Model):
     def __str__(self):
         return f"${self.amount} for {self.category.name} ({self.get_period_display()})"
 
+
+class DailyRollup(models.Model):
+    """
+    Per-user, per-day transaction totals keyed by category and type.
+
+    Maintained incrementally alongside Transaction writes (see
+    ``api.rollups``) so summary endpoints can aggregate days instead of
+    individual transactions. Rebuild with ``manage.py rebuild_rollups``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups', db_constraint=False)
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='daily_rollups')
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date']
+        indexes = [
+            # Summaries read the rollups dated after the latest balance snapshot
+            models.Index(fields=['user', 'date'], name='rollup_user_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'category', 'type'],
+                condition=models.Q(category__isnull=False),
+                name='unique_daily_rollup',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'date', 'type'],
+                condition=models.Q(category__isnull=True),
+                name='unique_uncategorized_daily_rollup',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} {self.date} {self.type}: ${self.total} ({self.count})"
+
+
+class BudgetSpend(models.Model):
+    """
+    Amount and count of a budget category's transactions dated in one
+    period of the budget, keyed by the period's first day.
+
+    Maintained incrementally alongside Transaction writes (see
+    ``api.budget_spend``) so budget status reads one row per budget.
+    Check or rebuild with ``manage.py reconcile_budget_spend``.
+    """
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='spend')
+    period_start = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['budget', 'period_start'], name='unique_budget_spend'),
+        ]
+    
+    def __str__(self):
+        return f"{self.budget} from {self.period_start}: ${self.total} ({self.count})"
+
+
+class DataVersion(models.Model):
+    """
+    Version of a user's financial data, bumped in the same database
+    transaction as every Category, Transaction or Budget write (see
+    ``api.summary_cache``). Cached summaries and ETags are keyed by it, so
+    all workers see a write as soon as it commits.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='data_version', db_constraint=False,
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.user} data version {self.version}"
+
+
+class UserShard(models.Model):
+    """
+    The database holding a user's categories, transactions, budgets and
+    their rollups and counters. Lives on ``default``; see ``api.shards``.
+
+    ``moving_to`` is set while ``manage.py rebalance_shards`` copies the
+    user's rows to another database.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='shard_placement')
+    database = models.CharField(max_length=100)
+    moving_to = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user} on {self.database}" + (f" (moving to {self.moving_to})" if self.moving_to else "")
+
+
+class ArchivedTransaction(models.Model):
+    """
+    A transaction dated before the retention window, moved out of the
+    transaction table by ``manage.py archive_transactions`` (see
+    ``api.archive``). It keeps its id and still counts in the rollups,
+    budget counters and summaries; the API lists it with ``?archived=true``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_transactions', db_constraint=False)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='archived_transactions')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    description = models.TextField(blank=True)
+    date = models.DateField()
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', '-date', '-created_at'], name='archived_txn_user_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived {self.get_type_display()}: ${self.amount} on {self.date}"
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Closing totals of a user's transactions per category and type, from
+    the first transaction through the last day of a month.
+
+    Taken for closed months by ``manage.py snapshot_balances`` (see
+    ``api.snapshots``) so summaries add only the rollups after the latest
+    snapshot to it. Writes dated on or before a snapshot's closing date
+    drop it and the later ones.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='balance_snapshots', db_constraint=False)
+    closing_date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, related_name='balance_snapshots')
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-closing_date']
+        indexes = [
+            models.Index(fields=['user', '-closing_date'], name='snapshot_user_closing_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'closing_date', 'category', 'type'],
+                condition=models.Q(category__isnull=False),
+                name='unique_balance_snapshot',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'closing_date', 'type'],
+                condition=models.Q(category__isnull=True),
+                name='unique_uncategorized_balance_snapshot',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} through {self.closing_date} {self.type}: ${self.total} ({self.count})"
@@ -0,0 +1,57 @@
+"""
+Money
+
+Summary and budget math is done in integer minor units (cents): database
+sums are converted once with ``to_cents`` and everything after that is
+plain int arithmetic, which is exact and cheaper than ``Decimal``.
+Amounts are converted to the response format only when a response is
+built, so cached summaries hold cents whatever format a client asks for.
+
+Response formats (``?amount_format=``):
+- float: JSON numbers in major units, the historical format (default)
+- string: exact decimal strings such as "-1020.50"
+- cents: JSON integers in minor units
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+AMOUNT_FORMATS = ('float', 'string', 'cents')
+DEFAULT_AMOUNT_FORMAT = 'float'
+
+
+def to_cents(value):
+    """Convert a Decimal (or None) amount in major units to integer cents."""
+    if value is None:
+        return 0
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int(value.scaleb(2).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def format_cents(cents, amount_format):
+    """Render integer ``cents`` in ``amount_format``."""
+    if amount_format == 'cents':
+        return cents
+    if amount_format == 'string':
+        units, remainder = divmod(abs(cents), 100)
+        return f"{'-' if cents < 0 else ''}{units}.{remainder:02d}"
+    return cents / 100
+
+
+def format_amounts(row, fields, amount_format):
+    """Return a copy of dict ``row`` with the cents ``fields`` rendered in ``amount_format``."""
+    formatted = dict(row)
+    for field in fields:
+        formatted[field] = format_cents(row[field], amount_format)
+    return formatted
+
+
+def parse_amount_format(value):
+    """
+    Validate an ``amount_format`` query param, returning the default when
+    it is missing. Raises ValueError for unknown formats.
+    """
+    if not value:
+        return DEFAULT_AMOUNT_FORMAT
+    if value not in AMOUNT_FORMATS:
+        raise ValueError(f"amount_format must be one of: {', '.join(AMOUNT_FORMATS)}")
+    return value
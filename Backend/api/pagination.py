@@ -0,0 +1,140 @@
+"""
+Pagination
+
+Keyset (cursor) pagination for the transactions list. Pages are selected
+with a ``WHERE (date, created_at, id) < cursor`` condition on the
+``txn_user_date_idx`` index instead of ``OFFSET``, and the total count is
+only computed when asked for, so every page costs the same however deep
+into the history it is.
+"""
+import base64
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over (date, created_at, id), newest first.
+
+    Query params:
+    - cursor: opaque cursor taken from a previous response's ``next`` link
+    - page_size: rows per page (default PAGE_SIZE, capped at max_page_size)
+    - include_count: "true" to include the total row count (extra query)
+
+    Response:
+    - next (url or null)
+    - count (number, only with include_count)
+    - results (list)
+    """
+    ordering = ('-date', '-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE or 10
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'include_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            position_date, created_at, pk = position
+            # The redundant date bound gives the index scan a starting point;
+            # the OR alone makes it read every newer row before the page
+            queryset = queryset.filter(
+                Q(date__lt=position_date)
+                | Q(date=position_date, created_at__lt=created_at)
+                | Q(date=position_date, created_at=created_at, id__lt=pk),
+                date__lte=position_date,
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(last))
+
+    def encode_cursor(self, row):
+        # Pages hold model instances, or dicts when paginating a .values() queryset
+        if isinstance(row, dict):
+            position_date, created_at, pk = row['date'], row['created_at'], row['id']
+        else:
+            position_date, created_at, pk = row.date, row.created_at, row.pk
+        raw = f'{position_date.isoformat()}|{created_at.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            position_date, created_at, pk = raw.split('|')
+            return date.fromisoformat(position_date), datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class TransactionPagination(BasePagination):
+    """
+    Uses keyset pagination when the request carries a ``cursor`` or
+    ``pagination=cursor`` query param, and the project's default
+    page-number pagination otherwise, so existing clients are unaffected.
+    """
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (request.query_params.get(self.mode_query_param) == 'cursor'
+                or KeysetPagination.cursor_query_param in request.query_params):
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return KeysetPagination().get_paginated_response_schema(schema)
@@ -0,0 +1,67 @@
+"""
+Renderers
+
+``FastJSONRenderer`` is the project's default JSON renderer: it encodes
+with orjson when it is installed and produces the same bytes as DRF's
+``JSONRenderer``, falling back to it for anything orjson cannot match.
+
+The CSV and NDJSON renderers are media types for the streaming
+transaction export. The export view returns a ``StreamingHttpResponse``
+directly, so these renderers exist for content negotiation (``Accept``
+headers and ``?format=csv``/``?format=ndjson``); they only render
+non-streamed payloads such as error responses, which are written as JSON
+text.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson. Dates, times, Decimals and
+    lazy strings go through DRF's ``JSONEncoder.default`` so they render
+    exactly as before. Indented output (the browsable API),
+    ``UNICODE_JSON = False`` and values orjson rejects (such as integers
+    wider than 64 bits) use the stdlib encoder. Floats outside
+    1e-4..1e16 are written in orjson's exponent style (``1e16`` rather
+    than ``1e+16``); no amount the API returns falls in that range.
+    """
+    _options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (data is None or orjson is None or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._default, option=self._options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape the separators JSON allows but JavaScript does not, as DRF does
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class _ErrorTextRenderer(BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, cls=JSONEncoder).encode(self.charset)
+
+
+class CSVRenderer(_ErrorTextRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(_ErrorTextRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -0,0 +1,194 @@
+"""
+Daily rollups
+
+Keeps ``DailyRollup`` rows in step with Transaction writes. Each rollup
+holds the total amount and transaction count for one (user, date,
+category, type) key, so summaries aggregate at most one row per day and
+category instead of every transaction.
+
+Callers should run these helpers in the same database transaction as the
+Transaction write they mirror. They also drop the balance snapshots
+(``api.snapshots``) that a write dated in a closed month makes stale.
+"""
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Sum
+
+from . import snapshots
+from .models import ArchivedTransaction, DailyRollup, Transaction
+
+
+def rollup_key(instance):
+    """Return the rollup lookup for a transaction instance."""
+    return {
+        'user_id': instance.user_id,
+        'date': instance.date,
+        'category_id': instance.category_id,
+        'type': instance.type,
+    }
+
+
+def _apply(key, amount, count):
+    """Add ``amount`` and ``count`` to the rollup at ``key``, creating it if missing."""
+    changes = {'total': F('total') + amount, 'count': F('count') + count}
+    rollups = DailyRollup.objects.filter(**key)
+    if rollups.update(**changes):
+        return
+    try:
+        with transaction.atomic(using=rollups.db):
+            DailyRollup.objects.create(total=amount, count=count, **key)
+    except IntegrityError:
+        # A concurrent writer created the row first; add to theirs.
+        rollups.update(**changes)
+
+
+def add_transaction(instance):
+    """Record a newly saved transaction in its rollup."""
+    _apply(rollup_key(instance), instance.amount, 1)
+    snapshots.invalidate_days([(instance.user_id, instance.date)])
+
+
+def add_transactions(instances):
+    """Record a batch of new transactions, issuing one update per distinct rollup key."""
+    totals = {}
+    for instance in instances:
+        key = tuple(rollup_key(instance).items())
+        amount, count = totals.get(key, (0, 0))
+        totals[key] = (amount + instance.amount, count + 1)
+    for key, (amount, count) in totals.items():
+        _apply(dict(key), amount, count)
+    snapshots.invalidate_days((instance.user_id, instance.date) for instance in instances)
+
+
+def remove_transaction(instance):
+    """Remove a transaction's previous contribution from its rollup."""
+    _apply(rollup_key(instance), -instance.amount, -1)
+    snapshots.invalidate_days([(instance.user_id, instance.date)])
+
+
+def remove_transactions(queryset):
+    """
+    Remove the contribution of every transaction in ``queryset`` from the
+    rollups, one update per rollup key. Call before deleting them with a
+    set-based DELETE.
+    """
+    days = []
+    for row in aggregate_transactions(queryset):
+        amount, count = row.pop('total'), row.pop('count')
+        _apply(row, -amount, -count)
+        days.append((row['user_id'], row['date']))
+    snapshots.invalidate_days(days)
+
+
+def move_transactions(queryset, changes):
+    """
+    Move the transactions in ``queryset`` to the rollups they will belong
+    to once ``changes`` (a dict of new field values, with ``category_id``
+    for the category) is applied to all of them with a set-based UPDATE.
+    Call before the UPDATE. Changes that touch no rollup field cost no
+    queries.
+    """
+    moved = {field: changes[field] for field in ('date', 'category_id', 'type') if field in changes}
+    if not moved and 'amount' not in changes:
+        return
+    days = []
+    for row in aggregate_transactions(queryset):
+        amount, count = row.pop('total'), row.pop('count')
+        _apply(row, -amount, -count)
+        new_amount = changes['amount'] * count if 'amount' in changes else amount
+        _apply({**row, **moved}, new_amount, count)
+        days += [(row['user_id'], row['date']), (row['user_id'], moved.get('date', row['date']))]
+    snapshots.invalidate_days(days)
+
+
+def fold_category(category):
+    """
+    Move a category's rollups into the uncategorized rows before it is
+    deleted, mirroring the SET_NULL applied to its transactions. Rows are
+    merged or re-pointed rather than created, so a cascading user delete
+    never meets rollups it did not collect. The user's balance snapshots
+    are dropped, as their rows for the category would need the same fold.
+    """
+    snapshots.clear([category.user_id])
+    rows = DailyRollup.objects.filter(category=category)
+    for row in rows.values('id', 'user_id', 'date', 'type', 'total', 'count'):
+        merged = DailyRollup.objects.filter(
+            user_id=row['user_id'], date=row['date'], category__isnull=True, type=row['type'],
+        ).update(total=F('total') + row['total'], count=F('count') + row['count'])
+        if merged:
+            DailyRollup.objects.filter(pk=row['id']).delete()
+        else:
+            DailyRollup.objects.filter(pk=row['id']).update(category=None)
+
+
+def aggregate_transactions(queryset):
+    """Return rollup rows (as dicts) computed from raw transactions."""
+    return queryset.values('user_id', 'date', 'category_id', 'type').annotate(
+        total=Sum('amount'), count=Count('id'),
+    ).order_by()
+
+
+def raw_totals(user_ids=None):
+    """
+    Return ``{(user_id, date, category_id, type): (total, count)}`` summed
+    from raw transactions, archived ones included, for all users or only
+    ``user_ids``.
+    """
+    totals = {}
+    for model in (Transaction, ArchivedTransaction):
+        transactions = model.objects.all()
+        if user_ids is not None:
+            transactions = transactions.filter(user_id__in=user_ids)
+        for row in aggregate_transactions(transactions).iterator():
+            key = (row['user_id'], row['date'], row['category_id'], row['type'])
+            total, count = totals.get(key, (0, 0))
+            totals[key] = (total + row['total'], count + row['count'])
+    return totals
+
+
+def rebuild(user_ids=None, batch_size=2000):
+    """
+    Recompute rollups from raw transactions, for all users or only the
+    given ``user_ids``, and drop their balance snapshots. Returns the
+    number of rollup rows written.
+    """
+    rollups = DailyRollup.objects.all()
+    if user_ids is not None:
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    with transaction.atomic(using=router.db_for_write(DailyRollup)):
+        rollups.delete()
+        snapshots.clear(user_ids)
+        rows = [
+            DailyRollup(user_id=user_id, date=day, category_id=category_id, type=type_, total=total, count=count)
+            for (user_id, day, category_id, type_), (total, count) in raw_totals(user_ids).items()
+        ]
+        DailyRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def verify(user_ids=None):
+    """
+    Compare stored rollups with raw transaction sums. Returns a list of
+    ``(key, expected, actual)`` tuples for every mismatching key, where
+    expected and actual are ``(total, count)`` pairs.
+    """
+    rollups = DailyRollup.objects.all()
+    if user_ids is not None:
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    def index(rows):
+        # Rows emptied by deletes are kept at zero and count as absent
+        # (compared after the decimal conversion, see budget_spend.verify).
+        return {
+            (row['user_id'], row['date'], row['category_id'], row['type']): (row['total'], row['count'])
+            for row in rows
+            if row['total'] or row['count']
+        }
+
+    expected = raw_totals(user_ids)
+    actual = index(rollups.values('user_id', 'date', 'category_id', 'type', 'total', 'count').iterator())
+    return [
+        (key, expected.get(key), actual.get(key))
+        for key in sorted(expected.keys() | actual.keys(), key=str)
+        if expected.get(key) != actual.get(key)
+    ]
@@ -0,0 +1,114 @@
+"""
+Read-replica routing
+
+Sends the heavy read-only views (financial and category summaries,
+budget status and the category, transaction and budget lists) to the
+``replica`` database when one is configured. Everything else, including
+all writes, uses ``default`` (the primary).
+
+Views opt in with ``replica_reads`` or ``ReplicaReadMixin``; the choice
+is held in a context variable for the duration of the view, which
+``ReplicaRouter.db_for_read`` consults. To give users read-your-writes
+consistency, a user's reads stay on the primary for
+``REPLICA_STICKY_SECONDS`` after their last Category, Transaction or
+Budget write, using the modification time ``api.summary_cache`` already
+records in the database on every write (so stickiness works across
+workers). That data version is always read from the primary: it decides
+which cached summaries and ETags are current, so a lagging replica must
+not roll it back.
+
+With two SQLite files standing in for primary and replica, copy the
+primary file to the replica path to "replicate".
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from . import summary_cache
+from .models import DataVersion
+
+REPLICA_ALIAS = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def is_sticky(user_id, modified=None):
+    """
+    Whether ``user_id`` wrote recently enough that the replica may not have
+    the write yet. ``modified`` is the time of their last write, if known.
+    """
+    if modified is None:
+        _, modified = summary_cache.get_state(user_id)
+    return time.time() - modified < getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+@contextmanager
+def reading_from_replica(request):
+    """
+    Route ORM reads made inside the block to the replica, unless none is
+    configured, the request is not a GET/HEAD from an authenticated user,
+    or that user wrote within the sticky window.
+    """
+    user = request.user
+    # Left on the request by api.conditional, which read it first
+    state = getattr(request, 'data_state', None)
+    use = (
+        replica_configured() and request.method in ('GET', 'HEAD')
+        and user.is_authenticated and not is_sticky(user.id, state[1] if state else None)
+    )
+    token = _use_replica.set(use)
+    try:
+        yield use
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_reads(view):
+    """Decorator running a view that takes the request first inside ``reading_from_replica``."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading_from_replica(request):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """ViewSet mixin that serves ``list`` inside ``reading_from_replica``."""
+
+    def list(self, request, *args, **kwargs):
+        with reading_from_replica(request):
+            return super().list(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """Database router for the primary/replica pair; see the module docstring."""
+
+    def db_for_read(self, model, **hints):
+        if model is DataVersion:
+            return None
+        return REPLICA_ALIAS if _use_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        # Explicitly the primary: an instance loaded from the replica would
+        # otherwise be saved back to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db == REPLICA_ALIAS:
+            return False
+        return None
@@ -0,0 +1,194 @@
+"""
+Transaction search
+
+Full-text search over transaction descriptions, backed by a real text
+index so a search does not scan every row with ``LIKE '%term%'``:
+
+- SQLite: an external-content FTS5 table (``api_transaction_fts``) kept
+  in step by triggers on ``api_transaction``, so every insert, update and
+  delete (including bulk writes) updates the index incrementally.
+  Results are ranked with FTS5's bm25.
+- PostgreSQL: a GIN expression index on
+  ``to_tsvector('simple', description)``, ranked with ``ts_rank``.
+- Other backends fall back to unindexed ``icontains`` matching.
+
+Every word of a query must match, as a prefix ("star coff" finds
+"Starbucks coffee").
+
+SQLite drops a table's triggers when a migration rebuilds the table. Run
+``python manage.py rebuild_search_index`` after such a migration, or if
+the index is ever suspected to be out of step.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'api_transaction_fts'
+POSTGRES_CONFIG = 'simple'
+POSTGRES_INDEX = 'txn_description_search_idx'
+MAX_TERMS = 8
+
+_SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON api_transaction BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END""",
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON api_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        END""",
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF description ON api_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END""",
+}
+
+# (alias, database name) -> whether the SQLite FTS5 table exists
+_fts_tables = {}
+
+
+def terms(query):
+    """Split a search query into at most ``MAX_TERMS`` words."""
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def _postgres_search(query):
+    from django.contrib.postgres.search import SearchQuery, SearchVector
+
+    tsquery = ' & '.join(f'{word}:*' for word in terms(query))
+    return (
+        SearchVector('description', config=POSTGRES_CONFIG),
+        SearchQuery(tsquery, config=POSTGRES_CONFIG, search_type='raw'),
+    )
+
+
+def _has_fts_table(connection):
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _fts_tables:
+        with connection.cursor() as cursor:
+            _fts_tables[key] = FTS_TABLE in connection.introspection.table_names(cursor)
+    return _fts_tables[key]
+
+
+def backend(using):
+    """Return 'sqlite' or 'postgresql' if database ``using`` has a text index, else None."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        return 'sqlite'
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    return None
+
+
+def _fallback_q(query):
+    condition = Q()
+    for word in terms(query):
+        condition &= Q(description__icontains=word)
+    return condition
+
+
+def search_transactions(queryset, query):
+    """
+    Return the transactions in ``queryset`` whose description matches
+    ``query``, best matches first (then newest first). A query without
+    any words matches nothing.
+    """
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    from .models import Transaction
+
+    if queryset.model is not Transaction:
+        # Archived transactions are not in the text index
+        return queryset.filter(_fallback_q(query))
+    index = backend(queryset.db)
+    if index == 'sqlite':
+        # Join the FTS table so the MATCH and the bm25 rank are computed
+        # once, by the index, rather than per transaction row. The unary
+        # '+' keeps the planner from driving the join from the user_id
+        # index and re-running the MATCH for every one of the user's rows
+        # (it does that for the unordered COUNT(*) the paginator issues).
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'+{FTS_TABLE}.rowid = api_transaction.id', f'{FTS_TABLE} MATCH %s'],
+            params=[' '.join(f'"{word}"*' for word in words)],
+            order_by=[f'{FTS_TABLE}.rank', '-date', '-created_at'],
+        )
+    if index == 'postgresql':
+        from django.contrib.postgres.search import SearchRank
+
+        vector, tsquery = _postgres_search(query)
+        return queryset.annotate(
+            search_document=vector, search_rank=SearchRank(vector, tsquery),
+        ).filter(search_document=tsquery).order_by('-search_rank', '-date', '-created_at')
+    return queryset.filter(_fallback_q(query))
+
+
+def matching(query, using='default'):
+    """
+    Return a ``Q`` selecting transactions whose description matches
+    ``query``, for combining with other conditions (unranked).
+    """
+    if not terms(query):
+        return Q(pk__in=[])
+    index = backend(using)
+    if index == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in terms(query))
+        return Q(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+    if index == 'postgresql':
+        from .models import Transaction
+
+        vector, tsquery = _postgres_search(query)
+        return Q(id__in=Transaction.objects.annotate(search_document=vector).filter(
+            search_document=tsquery,
+        ).values('id'))
+    return _fallback_q(query)
+
+
+def install(schema_editor):
+    """
+    Create the search index for the schema editor's database, replacing
+    any existing one, and fill it from the current transactions. Does
+    nothing on backends without a supported text index, or on SQLite
+    builds without FTS5.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA compile_options')
+            if 'ENABLE_FTS5' not in {row[0] for row in cursor.fetchall()}:
+                return
+        uninstall(schema_editor)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"description, content='api_transaction', content_rowid='id')"
+        )
+        for sql in _SQLITE_TRIGGERS.values():
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        from .models import Transaction
+
+        uninstall(schema_editor)
+        schema_editor.add_index(Transaction, GinIndex(
+            SearchVector('description', config=POSTGRES_CONFIG), name=POSTGRES_INDEX,
+        ))
+    _fts_tables.clear()
+
+
+def uninstall(schema_editor):
+    """Drop the search index created by ``install``, if any."""
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for name in _SQLITE_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX}')
+    _fts_tables.clear()
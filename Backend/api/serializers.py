@@ -43,3 +43,119 @@ class BudgetSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'category', 'category_name', 'category_type', 'amount', 
                   'period', 'start_date', 'created_at']
         read_only_fields = ['user', 'start_date', 'created_at']
+
+
+class TransactionImportSerializer(serializers.Serializer):
+    """
+    Serializer for one row of a bulk transaction import.
+
+    Rows name their category either by id (``category``) or by name
+    (``category_name``, matched against categories of the row's type).
+    Lookups go through the per-request ``categories`` cache in the context.
+    """
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    type = serializers.ChoiceField(choices=Transaction.TYPE_CHOICES)
+    date = serializers.DateField()
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    category = serializers.IntegerField(required=False, allow_null=True)
+    category_name = serializers.CharField(required=False)
+    
+    def validate(self, data):
+        """Resolve the category and validate that its type matches the transaction type"""
+        categories = self.context['categories']
+        transaction_type = data['type']
+        category_id = data.pop('category', None)
+        category_name = data.pop('category_name', None)
+        
+        if category_id is not None:
+            category_type = categories.type_of(category_id)
+            if category_type is None:
+                raise serializers.ValidationError({'category': f"Unknown category id {category_id}"})
+            if category_type != transaction_type:
+                raise serializers.ValidationError(
+                    f"Transaction type ({transaction_type}) must match category type ({category_type})"
+                )
+        elif category_name:
+            category_id = categories.id_for(category_name, transaction_type)
+            if category_id is None:
+                raise serializers.ValidationError(
+                    {'category_name': f"No {transaction_type} category named '{category_name}'"}
+                )
+        
+        data['category_id'] = category_id
+        return data
+
+
+class TransactionFilterSerializer(serializers.Serializer):
+    """
+    Filter expression selecting transactions for a bulk action: the
+    transaction list's query param filters. Unknown keys are rejected
+    rather than ignored, so a typo cannot widen the selection.
+    """
+    type = serializers.ChoiceField(choices=Transaction.TYPE_CHOICES, required=False)
+    category = serializers.IntegerField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            unknown = sorted(set(data) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError({key: ['Unknown filter.'] for key in unknown})
+        return super().to_internal_value(data)
+    
+    def validate(self, data):
+        """Require at least one filter"""
+        if not data:
+            raise serializers.ValidationError('Give at least one filter.')
+        return data
+
+
+class TransactionSelectionSerializer(serializers.Serializer):
+    """Selects transactions for a bulk action by ``ids`` or by ``filter``, but not both."""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=10000)
+    filter = TransactionFilterSerializer(required=False)
+    
+    def validate(self, data):
+        """Validate that exactly one selector is given"""
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError('Give either ids or filter.')
+        return data
+
+
+class TransactionChangesSerializer(serializers.Serializer):
+    """
+    Field values a bulk update sets on every selected transaction.
+
+    ``category`` is resolved through the per-request ``categories`` cache
+    in the context (it must be one of the user's categories, or null) and
+    returned as ``category_id``. Whether the new category and type agree
+    with the selected rows is checked by ``api.bulk``.
+    """
+    category = serializers.IntegerField(required=False, allow_null=True)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    date = serializers.DateField(required=False)
+    type = serializers.ChoiceField(choices=Transaction.TYPE_CHOICES, required=False)
+    
+    def validate(self, data):
+        """Resolve the category and validate that it matches the new type, if both are given"""
+        if not data:
+            raise serializers.ValidationError('Give at least one field to change.')
+        if 'category' in data:
+            category_id = data.pop('category')
+            if category_id is not None:
+                category_type = self.context['categories'].type_of(category_id)
+                if category_type is None:
+                    raise serializers.ValidationError({'category': f"Unknown category id {category_id}"})
+                if 'type' in data and category_type != data['type']:
+                    raise serializers.ValidationError(
+                        f"Transaction type ({data['type']}) must match category type ({category_type})"
+                    )
+            data['category_id'] = category_id
+        return data
+
+
+class TransactionBulkUpdateSerializer(TransactionSelectionSerializer):
+    """Selection plus the ``changes`` to apply to it."""
+    changes = TransactionChangesSerializer()
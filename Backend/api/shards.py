@@ -0,0 +1,369 @@
+"""
+Per-user sharding
+
+Spreads each user's financial rows (categories, transactions and
+archived transactions, budgets, daily rollups, budget spend counters,
+balance snapshots and data versions) over the databases listed in
+``SHARD_DATABASES``. Users, sessions and the rest of Django's tables
+stay on ``default``, together with one ``UserShard`` row per user
+recording where that user's rows live. New users are placed on
+``SHARD_DATABASES[user_id % len(SHARD_DATABASES)]``; users without a
+placement row (created before sharding was enabled) stay on ``default``
+until ``manage.py rebalance_shards`` moves them.
+
+``ShardRouter`` sends every query on a sharded model to the shard of the
+request's user (bound by ``api.middleware.ShardContextMiddleware``), of a
+``User`` passed as the ``instance`` hint, or of the instance being saved.
+Code running outside a request, such as management commands, picks a
+database with ``pinned``. Placements are cached for
+``SHARD_PLACEMENT_TIMEOUT`` seconds.
+
+Rows keep their ids when they move, so every shard hands out ids from its
+own range (``SHARD_ID_SPAN`` ids per shard, reserved after ``migrate``).
+Shards are numbered by their position in ``SHARD_DATABASES``: append new
+ones at the end and never reorder them.
+
+Moves are online: the user's writes are refused with 503 while the rows
+are copied, reads keep going to the old shard until the copy is
+committed, and the old rows are deleted once no request can still be
+using the old placement. See ``move_users``.
+
+Does nothing when ``SHARD_DATABASES`` is empty.
+"""
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Count
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import (
+    ArchivedTransaction, BalanceSnapshot, Budget, BudgetSpend, Category, DailyRollup, DataVersion, Transaction,
+    UserShard,
+)
+
+# Parents before children, so copies satisfy foreign keys in this order and
+# deletes in the reverse one.
+SHARDED_MODELS = [
+    Category, Transaction, ArchivedTransaction, Budget, DailyRollup, BudgetSpend, BalanceSnapshot, DataVersion,
+]
+_SHARDED_LABELS = {model._meta.label_lower for model in SHARDED_MODELS}
+
+# Ids reserved per shard: shard N allocates from N * SHARD_ID_SPAN, while
+# ``default`` keeps the ids below SHARD_ID_SPAN.
+SHARD_ID_SPAN = 2 ** 40
+
+Placement = namedtuple('Placement', ['database', 'moving_to'])
+
+_request = ContextVar('shard_request', default=None)
+_pinned = ContextVar('shard_pinned', default=None)
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Your data is being moved to another database. Try again shortly.'
+    default_code = 'shard_moving'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+def enabled():
+    return bool(getattr(settings, 'SHARD_DATABASES', None))
+
+
+def data_databases():
+    """Every database that can hold financial rows: ``default`` and the shards."""
+    return [DEFAULT_DB_ALIAS, *getattr(settings, 'SHARD_DATABASES', [])]
+
+
+def home_shard(user_id):
+    """The shard a new user is placed on."""
+    shards = settings.SHARD_DATABASES
+    return shards[user_id % len(shards)]
+
+
+def _cache():
+    return caches[getattr(settings, 'SHARD_CACHE_ALIAS', 'default')]
+
+
+def _cache_key(user_id):
+    return f'user-shard:{user_id}'
+
+
+def load_placement(user_id):
+    """Read ``user_id``'s placement from the database, bypassing the cache."""
+    row = UserShard.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).values_list(
+        'database', 'moving_to',
+    ).first()
+    return Placement(*row) if row else Placement(DEFAULT_DB_ALIAS, '')
+
+
+def placement(user_id):
+    """Return ``user_id``'s cached placement."""
+    cache = _cache()
+    key = _cache_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        value = tuple(load_placement(user_id))
+        cache.set(key, value, timeout=getattr(settings, 'SHARD_PLACEMENT_TIMEOUT', 30))
+    return Placement(*value)
+
+
+def set_placement(user_id, database, moving_to=''):
+    UserShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        user_id=user_id, defaults={'database': database, 'moving_to': moving_to},
+    )
+    _cache().delete(_cache_key(user_id))
+
+
+def forget_placement(user_id):
+    _cache().delete(_cache_key(user_id))
+
+
+def assign(user):
+    """Place a newly created user on their home shard."""
+    if enabled():
+        set_placement(user.pk, home_shard(user.pk))
+
+
+@contextmanager
+def bound_request(request):
+    """Route sharded queries made inside the block to the shard of ``request.user``."""
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+@contextmanager
+def pinned(database):
+    """Route every sharded query made inside the block to ``database``."""
+    token = _pinned.set(database)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def data_db():
+    """Alias of the database the current context writes financial rows to."""
+    return router.db_for_write(Transaction)
+
+
+def _request_placement(request):
+    """The request user's placement, looked up once per request."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None, None
+    cached = getattr(request, '_shard_placement', None)
+    if cached is None or cached[0] != user.pk:
+        cached = (user.pk, placement(user.pk))
+        request._shard_placement = cached
+    return cached
+
+
+class ShardRouter:
+    """Database router for the sharded models; see the module docstring."""
+
+    def _database(self, model, hints, write):
+        if not enabled():
+            return None
+        instance = hints.get('instance')
+        if model._meta.label_lower not in _SHARDED_LABELS:
+            # Related users of a sharded row, such as those read to validate
+            # a foreign key, live on ``default``, not on the row's shard.
+            if instance is not None and instance._state.db in settings.SHARD_DATABASES:
+                return DEFAULT_DB_ALIAS
+            return None
+        database = _pinned.get()
+        if database is not None:
+            return database
+        request = _request.get()
+        user_id, current = _request_placement(request) if request is not None else (None, None)
+        if write and current is not None and current.moving_to:
+            raise ShardMoving(getattr(settings, 'SHARD_MOVE_GRACE_SECONDS', 35))
+
+        if instance is not None and instance._meta.label_lower in _SHARDED_LABELS and instance._state.db:
+            return instance._state.db
+        if isinstance(instance, User) and instance.pk is not None and instance.pk != user_id:
+            return placement(instance.pk).database
+        return current.database if current is not None else None
+
+    def db_for_read(self, model, **hints):
+        return self._database(model, hints, write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._database(model, hints, write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Financial rows point at users on ``default`` without a database
+        # constraint (see migration 0006).
+        databases = data_databases()
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'SHARD_DATABASES', []):
+            if app_label != 'api' or model_name == 'usershard':
+                return False
+            # Data migrations written before sharding query without
+            # ``using`` and would run against ``default``; 0009 repeats
+            # them for shards.
+            return model_name is not None or hints.get('shard_aware', False)
+        return None
+
+
+def reserve_ids(database):
+    """Start the sharded tables' ids on ``database`` at the shard's range, if below it."""
+    base = (settings.SHARD_DATABASES.index(database) + 1) * SHARD_ID_SPAN
+    connection = connections[database]
+    with connection.cursor() as cursor:
+        for model in SHARDED_MODELS:
+            if model._meta.auto_field is None:
+                # Keyed by user id
+                continue
+            table = model._meta.db_table
+            if connection.vendor == 'sqlite':
+                cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s', [base - 1, table])
+                if not cursor.rowcount:
+                    cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, base - 1])
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) + 1 FROM {connection.ops.quote_name(table)})), false)",
+                    [table, base],
+                )
+
+
+def _user_rows(model, user_id, database):
+    rows = model._base_manager.using(database)
+    if model is BudgetSpend:
+        return rows.filter(budget__user_id=user_id)
+    return rows.filter(user_id=user_id)
+
+
+def _copy_rows(model, rows, target):
+    """Insert ``rows`` into ``target`` as they are, ids and timestamps included."""
+    # bulk_create() stamps auto_now and auto_now_add fields such as
+    # created_at with the current time; bulk_update() writes them back.
+    stamped = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    originals = [[getattr(row, field.attname) for field in stamped] for row in rows]
+    manager = model._base_manager.using(target)
+    manager.bulk_create(rows)
+    if stamped:
+        for row, values in zip(rows, originals):
+            for field, value in zip(stamped, values):
+                setattr(row, field.attname, value)
+        manager.bulk_update(rows, [field.name for field in stamped])
+
+
+def copy_user(user_id, source, target, batch_size=2000):
+    """
+    Copy ``user_id``'s rows from ``source`` to ``target`` in one transaction
+    on ``target``, keeping their ids. Returns the number of rows copied.
+    """
+    copied = 0
+    with transaction.atomic(using=target):
+        for model in SHARDED_MODELS:
+            batch = []
+            for row in _user_rows(model, user_id, source).order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    _copy_rows(model, batch, target)
+                    copied += len(batch)
+                    batch = []
+            if batch:
+                _copy_rows(model, batch, target)
+                copied += len(batch)
+            expected = _user_rows(model, user_id, source).count()
+            if _user_rows(model, user_id, target).count() != expected:
+                raise RuntimeError(f'{model._meta.label} rows of user {user_id} changed during the copy')
+    return copied
+
+
+def purge_user(user_id, database):
+    """Delete ``user_id``'s rows from ``database``. Returns the number of rows deleted."""
+    deleted = 0
+    # Children first, so no delete cascades. The delete signals bump the
+    # user's data version on ``database``, so that row goes last.
+    models = [model for model in reversed(SHARDED_MODELS) if model is not DataVersion] + [DataVersion]
+    with pinned(database), transaction.atomic(using=database):
+        for model in models:
+            deleted += _user_rows(model, user_id, database).delete()[0]
+    return deleted
+
+
+def move_users(moves, grace=None, batch_size=2000, log=None):
+    """
+    Move users' rows between databases while the site is serving them.
+    ``moves`` maps user ids to target databases. Returns the list of
+    ``(user_id, source, target, rows)`` moves made.
+
+    1. Mark the users as moving, so their writes are refused with 503.
+    2. Wait ``grace`` seconds (``SHARD_MOVE_GRACE_SECONDS``) for in-flight
+       writes and cached placements to expire.
+    3. Copy each user's rows, then point their placement at the target.
+       A failed copy is rolled back and the user stays where they were.
+    4. Wait ``grace`` seconds again for reads of the old placement to
+       finish, then delete the old rows.
+    """
+    if grace is None:
+        grace = getattr(settings, 'SHARD_MOVE_GRACE_SECONDS', 35)
+    log = log or (lambda message: None)
+
+    sources = {}
+    for user_id, target in moves.items():
+        current = load_placement(user_id)
+        if current.moving_to:
+            raise RuntimeError(f'User {user_id} is already moving to {current.moving_to}')
+        if current.database != target:
+            sources[user_id] = current.database
+    if not sources:
+        return []
+
+    for user_id, source in sources.items():
+        set_placement(user_id, source, moves[user_id])
+    log(f'Marked {len(sources)} users as moving; waiting {grace}s for in-flight writes.')
+    time.sleep(grace)
+
+    moved = []
+    try:
+        for user_id, source in sources.items():
+            target = moves[user_id]
+            try:
+                rows = copy_user(user_id, source, target, batch_size)
+            except Exception:
+                set_placement(user_id, source)
+                raise
+            set_placement(user_id, target)
+            moved.append((user_id, source, target, rows))
+            log(f'Copied {rows} rows of user {user_id} from {source} to {target}.')
+    finally:
+        for user_id, source in sources.items():
+            if user_id not in {move[0] for move in moved}:
+                set_placement(user_id, source)
+        if moved:
+            log(f'Waiting {grace}s before deleting the old rows.')
+            time.sleep(grace)
+            for user_id, source, _, _ in moved:
+                purge_user(user_id, source)
+    return moved
+
+
+def user_sizes(database):
+    """Return ``{user_id: transaction count}`` for the users with transactions on ``database``."""
+    rows = Transaction.objects.using(database).values_list('user_id').annotate(count=Count('id')).order_by()
+    return dict(rows)
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import budget_spend, rollups, shards, summary_cache, user_cache
+from .models import Budget, Category, Transaction
+
+
+@receiver(pre_delete, sender=Category)
+def fold_category_rollups(sender, instance, **kwargs):
+    """Keep rollups consistent when a category's transactions become uncategorized."""
+    rollups.fold_category(instance)
+
+
+@receiver(post_save, sender=Budget)
+def rebuild_budget_spend(sender, instance, raw=False, **kwargs):
+    """Recompute a saved budget's spend counters; its category or period may have changed."""
+    if not raw:
+        with shards.pinned(instance._state.db):
+            budget_spend.rebuild(budget_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Budget)
+def invalidate_summaries(sender, instance, origin=None, **kwargs):
+    """Bump the owner's data version in the write's transaction, dropping their cached summaries."""
+    if isinstance(origin, User):
+        # The user is being deleted, data version included
+        return
+    summary_cache.invalidate(instance.user_id, using=instance._state.db)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached user row, e.g. after a password change."""
+    user_id = instance.pk
+    # Drop it now and again after commit: another request may re-cache the
+    # old row before the write becomes visible.
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+@receiver(post_save, sender=User)
+def place_new_user(sender, instance, created=False, raw=False, **kwargs):
+    """Give a new user a home shard for their financial rows."""
+    if created and not raw:
+        shards.assign(instance)
+
+
+@receiver(pre_delete, sender=User)
+def purge_sharded_rows(sender, instance, **kwargs):
+    """
+    Delete a user's rows from their shard; the cascade only reaches rows
+    on ``default``.
+    """
+    current = shards.load_placement(instance.pk)
+    for database in {current.database, current.moving_to} - {'', DEFAULT_DB_ALIAS}:
+        shards.purge_user(instance.pk, database)
+    shards.forget_placement(instance.pk)
+
+
+@receiver(post_migrate)
+def reserve_shard_ids(sender, using, **kwargs):
+    """Start a freshly migrated shard's ids in its own range."""
+    if sender.name == 'api' and using in getattr(settings, 'SHARD_DATABASES', []):
+        shards.reserve_ids(using)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    """Drop the cached user row when its session ends."""
+    if user is not None:
+        user_cache.invalidate(user.pk)
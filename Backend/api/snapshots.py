@@ -0,0 +1,176 @@
+"""
+Closing-balance snapshots
+
+``BalanceSnapshot`` rows hold a user's running totals per category and
+type from their first transaction through the last day of each closed
+month. The summaries read the latest snapshot plus the daily rollups
+dated after it (see ``api.summaries``), so their cost follows the current
+month rather than the length of the user's history.
+
+``manage.py snapshot_balances`` takes the snapshots of months that have
+ended, from the rollups, continuing from each user's latest snapshot.
+A write dated on or before a snapshot's closing date makes it stale:
+``api.rollups`` drops the user's snapshots from that date on, which only
+costs a query for writes dated before the current month, and the next
+run takes them again.
+"""
+from datetime import date, timedelta
+
+from django.db import router, transaction
+from django.db.models import DateField, Max, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .budgets import period_window
+from .models import BalanceSnapshot, Budget, DailyRollup
+from .money import to_cents
+
+
+def last_closing_date(today):
+    """The last day of the month before ``today``'s, the latest a snapshot may close on."""
+    return today.replace(day=1) - timedelta(days=1)
+
+
+def latest_closing_date(user):
+    """Queryset of the closing date of ``user``'s latest snapshot, for use as a subquery."""
+    return BalanceSnapshot.objects.filter(user=user).order_by('-closing_date').values('closing_date')[:1]
+
+
+def since_latest(user, fields):
+    """
+    Return one query of ``(*fields, total, count)`` rows: the latest
+    snapshot of ``user`` grouped by ``fields``, followed by the rollups
+    dated after it grouped the same way. Callers add up rows with equal
+    ``fields``.
+    """
+    latest = Subquery(latest_closing_date(user))
+    snapshot = BalanceSnapshot.objects.filter(user=user, closing_date=latest)
+    recent = DailyRollup.objects.filter(
+        user=user, date__gt=Coalesce(latest, Value(date.min), output_field=DateField()),
+    )
+    return snapshot.values_list(*fields).annotate(total=Sum('total'), count=Sum('count')).order_by().union(
+        recent.values_list(*fields).annotate(total=Sum('total'), count=Sum('count')).order_by(),
+        all=True,
+    )
+
+
+def invalidate_days(days):
+    """
+    Drop the snapshots made stale by writes dated on the given
+    ``(user_id, date)`` pairs: one DELETE per user with a write dated
+    before the current month, none otherwise.
+    """
+    month_start = timezone.localdate().replace(day=1)
+    earliest = {}
+    for user_id, day in days:
+        if day < month_start and day < earliest.get(user_id, month_start):
+            earliest[user_id] = day
+    for user_id, day in earliest.items():
+        BalanceSnapshot.objects.filter(user_id=user_id, closing_date__gte=day).delete()
+
+
+def clear(user_ids=None):
+    """Drop every snapshot, or those of ``user_ids``."""
+    snapshots = BalanceSnapshot.objects.all()
+    if user_ids is not None:
+        snapshots = snapshots.filter(user_id__in=user_ids)
+    snapshots.delete()
+
+
+def _take_user(user_id, closing, batch_size):
+    latest = BalanceSnapshot.objects.filter(user_id=user_id).aggregate(latest=Max('closing_date'))['latest']
+    if latest is not None and latest >= closing:
+        return 0
+    running = {}
+    rollups = DailyRollup.objects.filter(user_id=user_id, date__lte=closing)
+    if latest is not None:
+        for row in BalanceSnapshot.objects.filter(user_id=user_id, closing_date=latest).values(
+            'category_id', 'type', 'total', 'count',
+        ):
+            running[row['category_id'], row['type']] = (row['total'], row['count'])
+        rollups = rollups.filter(date__gt=latest)
+
+    months = {}
+    for row in rollups.annotate(month=TruncMonth('date')).values('month', 'category_id', 'type').annotate(
+        total=Sum('total'), count=Sum('count'),
+    ).order_by():
+        months.setdefault(row['month'], []).append(row)
+    if latest is not None:
+        month = latest + timedelta(days=1)
+    elif months:
+        month = min(months)
+    else:
+        return 0
+
+    snapshots = []
+    while month <= closing:
+        for row in months.get(month, ()):
+            key = (row['category_id'], row['type'])
+            total, count = running.get(key, (0, 0))
+            running[key] = (total + row['total'], count + row['count'])
+        month_end = period_window(Budget.MONTHLY, month)[1]
+        snapshots.extend(
+            BalanceSnapshot(
+                user_id=user_id, closing_date=month_end, category_id=category_id, type=type_,
+                total=total, count=count,
+            )
+            for (category_id, type_), (total, count) in running.items()
+            if count
+        )
+        month = month_end + timedelta(days=1)
+    BalanceSnapshot.objects.bulk_create(snapshots, batch_size=batch_size)
+    return len(snapshots)
+
+
+def take(user_ids=None, today=None, batch_size=2000):
+    """
+    Take the missing snapshots of every month closed by ``today``
+    (default: the current date), for all users with rollups or only
+    ``user_ids``. Returns the number of snapshot rows written.
+    """
+    closing = last_closing_date(today or timezone.localdate())
+    rollups = DailyRollup.objects.filter(date__lte=closing)
+    if user_ids is not None:
+        rollups = rollups.filter(user_id__in=user_ids)
+    written = 0
+    for user_id in list(rollups.values_list('user_id', flat=True).distinct().order_by()):
+        with transaction.atomic(using=router.db_for_write(BalanceSnapshot)):
+            written += _take_user(user_id, closing, batch_size)
+    return written
+
+
+def verify(user_ids=None):
+    """
+    Compare each user's latest snapshot with the rollups summed through
+    its closing date. Returns a list of ``(key, expected, actual)`` tuples
+    for every mismatching ``(user_id, closing_date, category_id, type)``
+    key, where expected and actual are ``(cents, count)`` pairs.
+    """
+    latest = BalanceSnapshot.objects.values('user_id').annotate(closing=Max('closing_date')).order_by()
+    if user_ids is not None:
+        latest = latest.filter(user_id__in=user_ids)
+
+    mismatches = []
+    for row in latest:
+        user_id, closing = row['user_id'], row['closing']
+        # Totals are compared in cents: SQLite sums decimals as floats, so
+        # the rollup sums can come back as e.g. 86018.0099999999.
+        expected = {
+            (user_id, closing, category_id, type_): (to_cents(total), count)
+            for category_id, type_, total, count in DailyRollup.objects.filter(
+                user_id=user_id, date__lte=closing,
+            ).values_list('category_id', 'type').annotate(total=Sum('total'), count=Sum('count')).order_by()
+            if count
+        }
+        actual = {
+            (user_id, closing, category_id, type_): (to_cents(total), count)
+            for category_id, type_, total, count in BalanceSnapshot.objects.filter(
+                user_id=user_id, closing_date=closing,
+            ).values_list('category_id', 'type', 'total', 'count')
+        }
+        mismatches.extend(
+            (key, expected.get(key), actual.get(key))
+            for key in sorted(expected.keys() | actual.keys(), key=str)
+            if expected.get(key) != actual.get(key)
+        )
+    return mismatches
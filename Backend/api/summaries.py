@@ -0,0 +1,94 @@
+"""
+Summaries
+
+Read-side computations behind the summary endpoints. They read the
+user's latest closing-balance snapshot plus the per-day rollups dated
+after it (see ``api.snapshots``) rather than individual transactions.
+The ``a``-prefixed coroutines are the async ORM equivalents used by the
+async views.
+
+Amounts are returned as integer cents (see ``api.money``); the views
+convert them to the requested response format.
+"""
+from .models import Transaction
+from .money import format_amounts, to_cents
+from .snapshots import since_latest
+
+FINANCIAL_AMOUNT_FIELDS = ('total_income', 'total_expenses', 'balance')
+CATEGORY_AMOUNT_FIELDS = ('total',)
+CATEGORY_FIELDS = ['category__name', 'category__type', 'type']
+
+
+def financial_totals(user):
+    """Return total income, total expenses and balance for ``user``."""
+    return _financial_payload(_add_by_type(since_latest(user, ['type'])))
+
+
+def _add_by_type(rows):
+    totals = {}
+    for type_, total, _ in rows:
+        totals[type_] = totals.get(type_, 0) + total
+    return {type_: to_cents(total) for type_, total in totals.items()}
+
+
+def financial_totals_from_categories(category_rows):
+    """
+    Derive the financial totals from ``category_totals`` rows, so callers
+    that already have the category breakdown need no second query.
+    """
+    totals = {}
+    for row in category_rows:
+        totals[row['type']] = totals.get(row['type'], 0) + row['total']
+    return _financial_payload(totals)
+
+
+def _financial_payload(totals):
+    total_income = totals.get(Transaction.INCOME, 0)
+    total_expenses = totals.get(Transaction.EXPENSE, 0)
+    
+    return {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'balance': total_income - total_expenses,
+    }
+
+
+def category_totals(user):
+    """Return totals grouped by category name and type for ``user``."""
+    return _category_rows(since_latest(user, CATEGORY_FIELDS))
+
+
+def _category_rows(rows):
+    totals = {}
+    for name, category_type, type_, total, count in rows:
+        key = (name, category_type, type_)
+        previous_total, previous_count = totals.get(key, (0, 0))
+        totals[key] = (previous_total + total, previous_count + count)
+    # Rollups emptied by deletes are kept at zero; leave out keys without transactions
+    result = [
+        {'category__name': name, 'category__type': category_type, 'type': type_, 'total': to_cents(total)}
+        for (name, category_type, type_), (total, count) in totals.items()
+        if count
+    ]
+    result.sort(key=lambda row: row['total'], reverse=True)
+    return result
+
+
+def format_financial(totals, amount_format):
+    """Render a financial totals dict in ``amount_format``."""
+    return format_amounts(totals, FINANCIAL_AMOUNT_FIELDS, amount_format)
+
+
+def format_categories(rows, amount_format):
+    """Render ``category_totals`` rows in ``amount_format``."""
+    return [format_amounts(row, CATEGORY_AMOUNT_FIELDS, amount_format) for row in rows]
+
+
+async def afinancial_totals(user):
+    """Async variant of ``financial_totals``."""
+    return _financial_payload(_add_by_type([row async for row in since_latest(user, ['type'])]))
+
+
+async def acategory_totals(user):
+    """Async variant of ``category_totals``."""
+    return _category_rows([row async for row in since_latest(user, CATEGORY_FIELDS)])
@@ -0,0 +1,147 @@
+"""
+Summary cache
+
+Per-user cache for the summary endpoints, built on Django's cache
+framework (``SUMMARY_CACHE_ALIAS``, the locmem ``default`` cache unless
+configured otherwise). Every entry key embeds the user's current data
+version, a ``DataVersion`` row that every Category, Transaction or Budget
+write bumps in its own database transaction (see ``api.signals``). That
+makes all of the user's cached summaries unreachable at once without
+having to enumerate them, and because the version lives in the database,
+every worker sees the bump as soon as the write commits, whatever the
+cache backend. The time of the last bump is kept next to the version for
+Last-Modified headers (see ``api.conditional``).
+
+Hit and miss counters are kept per process.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DataVersion
+
+# Part of every entry key; bump it whenever the shape of cached payloads
+# changes so a shared cache never serves entries written by older code.
+ENTRY_FORMAT = 3
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'SUMMARY_CACHE_ALIAS', 'default')]
+
+
+def _versions(user_id, using=None):
+    return DataVersion.objects.using(using).filter(user_id=user_id)
+
+
+def _state(row):
+    # A user who never wrote has version 0; their Last-Modified is unknown
+    # and taken to be now.
+    if row is None:
+        return 0, time.time()
+    return row[0], row[1].timestamp()
+
+
+def invalidate(user_id, using=None):
+    """
+    Bump the user's data version, invalidating every cached summary. Call
+    inside the transaction of the write, on its database (``using``, or
+    the user's data database by default).
+    """
+    changes = {'version': F('version') + 1, 'modified': timezone.now()}
+    versions = _versions(user_id, using)
+    if not versions.update(**changes):
+        try:
+            with transaction.atomic(using=versions.db):
+                DataVersion.objects.using(versions.db).create(user_id=user_id, version=1, modified=changes['modified'])
+        except IntegrityError:
+            # A concurrent writer created the row first; bump theirs.
+            versions.update(**changes)
+    _record('invalidations')
+
+
+def get_state(user_id):
+    """
+    Return ``(version, modified)`` for the user's data, where ``modified``
+    is the Unix time of the last invalidation.
+    """
+    return _state(_versions(user_id).values_list('version', 'modified').first())
+
+
+def get_version(user_id):
+    """Return the user's current data version."""
+    return get_state(user_id)[0]
+
+
+def get_or_compute(user_id, name, compute, version=None):
+    """
+    Return the cached value of summary ``name`` for the user, calling
+    ``compute()`` and caching its result on a miss. Pass the user's data
+    ``version`` if the request already read it.
+    """
+    cache = _cache()
+    if version is None:
+        version = get_version(user_id)
+    key = f'summary:{ENTRY_FORMAT}:{name}:{user_id}:{version}'
+    value = cache.get(key)
+    if value is not None:
+        _record('hits')
+        return value
+    _record('misses')
+    value = compute()
+    cache.set(key, value, timeout=getattr(settings, 'SUMMARY_CACHE_TIMEOUT', 3600))
+    return value
+
+
+async def aget_state(user_id):
+    """Async variant of ``get_state``."""
+    return _state(await _versions(user_id).values_list('version', 'modified').afirst())
+
+
+async def aget_version(user_id):
+    """Async variant of ``get_version``."""
+    return (await aget_state(user_id))[0]
+
+
+async def aget_or_compute(user_id, name, compute, version=None):
+    """
+    Async variant of ``get_or_compute``; ``compute`` is a coroutine
+    function. Shares cache entries with the sync variant.
+    """
+    cache = _cache()
+    if version is None:
+        version = await aget_version(user_id)
+    key = f'summary:{ENTRY_FORMAT}:{name}:{user_id}:{version}'
+    value = await cache.aget(key)
+    if value is not None:
+        _record('hits')
+        return value
+    _record('misses')
+    value = await compute()
+    await cache.aset(key, value, timeout=getattr(settings, 'SUMMARY_CACHE_TIMEOUT', 3600))
+    return value
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def stats():
+    """Return this process's hit, miss and invalidation counters."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+        return {
+            'hits': hits,
+            'misses': misses,
+            'invalidations': _stats['invalidations'],
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
@@ -0,0 +1,1014 @@
+import csv
+import json
+import logging
+import time
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from operator import itemgetter
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import (
+    AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from rest_framework.exceptions import NotFound
+from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+
+from . import archive, budget_spend, metrics, rollups, routers, search, shards, snapshots, summary_cache
+from .budgets import evaluate_budgets
+from .checks import check_shared_caches
+from .exports import EXPORT_FIELDS
+from .imports import import_transactions, parse_json_lines
+from .listing import LeanListMixin
+from .models import BalanceSnapshot, Budget, Category, DailyRollup, DataVersion, Transaction
+from .money import format_cents, parse_amount_format, to_cents
+from .serializers import TransactionSerializer
+from .views import TransactionViewSet
+
+
+def create_transaction(user, category, amount, day):
+    """Save a transaction and count it in the rollups and spend counters, as the API does."""
+    txn = Transaction.objects.create(
+        user=user, category=category, amount=Decimal(amount), date=day, type=Transaction.EXPENSE,
+    )
+    rollups.add_transaction(txn)
+    budget_spend.add_transaction(txn)
+    return txn
+
+
+# (name, url) pairs; urls are formatted with the ids of the seeded objects
+QUERY_COUNT_SCENARIOS = [
+    ('categories list', '/api/categories/'),
+    ('categories retrieve', '/api/categories/{category}/'),
+    ('transactions list', '/api/transactions/'),
+    ('transactions retrieve', '/api/transactions/{transaction}/'),
+    ('transactions filtered list', '/api/transactions/?type=expense&category={category}&start_date=2000-01-01'),
+    ('transactions cursor list', '/api/transactions/?pagination=cursor&page_size=50'),
+    ('budgets list', '/api/budgets/'),
+    ('budgets retrieve', '/api/budgets/{budget}/'),
+    ('financial summary', '/api/financial-summary/'),
+    ('category summary', '/api/category-summary/'),
+    ('budget status', '/api/budget-status/'),
+    ('budget history', '/api/budget-history/'),
+    ('budget history detail', '/api/budgets/{budget}/history/'),
+    ('dashboard', '/api/dashboard/'),
+    ('analytics timeseries', '/api/analytics/timeseries/?breakdown=category'),
+]
+
+
+class UserDataTestCase(TestCase):
+    """Creates ``self.user`` and routes financial queries to their database."""
+    databases = '__all__'
+    username = 'user'
+
+    def setUp(self):
+        # Ids are handed out again once a test's transaction rolls back, so
+        # drop cached summaries and placements keyed by them
+        cache.clear()
+        self.user = User.objects.create(username=self.username, is_staff=True, is_superuser=True)
+        self.database = shards.placement(self.user.pk).database
+        pinned = shards.pinned(self.database)
+        pinned.__enter__()
+        self.addCleanup(pinned.__exit__, None, None, None)
+
+    def assertCountersMatch(self):
+        self.assertEqual(rollups.verify([self.user.pk]), [])
+        self.assertEqual(budget_spend.verify([self.user.pk]), [])
+
+
+class BudgetStatusTests(UserDataTestCase):
+    today = date(2024, 5, 15)
+
+    def add_budgets(self, count):
+        existing = Category.objects.filter(user=self.user).count()
+        for n in range(existing, existing + count):
+            category = Category.objects.create(user=self.user, name=f'category-{n}', type=Category.EXPENSE)
+            for period, _ in Budget.PERIOD_CHOICES:
+                Budget.objects.create(user=self.user, category=category, amount=Decimal('100'), period=period)
+            create_transaction(self.user, category, '12.50', self.today)
+            create_transaction(self.user, category, '7.50', self.today - timedelta(days=40))
+
+    def test_one_query_for_any_number_of_budgets(self):
+        for count in (1, 5):
+            self.add_budgets(count)
+            with self.assertNumQueries(1, using=self.database):
+                rows = evaluate_budgets(self.user, self.today)
+            self.assertEqual(len(rows), Budget.objects.filter(user=self.user).count())
+
+    def test_actuals_follow_the_period_window(self):
+        self.add_budgets(1)
+        actual = {row['period']: row['actual_amount'] for row in evaluate_budgets(self.user, self.today)}
+        # The older transaction is outside this week and month, but in this year
+        self.assertEqual(actual, {'Weekly': 1250, 'Monthly': 1250, 'Yearly': 2000})
+
+
+class TransactionWriteTests(UserDataTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        Budget.objects.create(user=self.user, category=self.category, amount=Decimal('100'))
+        self.transactions = [
+            create_transaction(self.user, self.category, '5.00', date.today() - timedelta(days=n))
+            for n in range(3)
+        ]
+        self.client.force_login(self.user)
+
+    def test_api_writes_keep_counters(self):
+        response = self.client.post('/api/transactions/', {
+            'category': self.category.pk, 'amount': '12.34', 'date': str(date.today()), 'type': Transaction.EXPENSE,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertCountersMatch()
+        url = f"/api/transactions/{response.json()['id']}/"
+        for changes in (
+            {'amount': '0.01'},
+            {'date': str(date.today() - timedelta(days=400))},
+            {'category': None},
+            {'type': Transaction.INCOME},
+            {'category': self.category.pk, 'type': Transaction.EXPENSE, 'amount': '99999.99'},
+        ):
+            with self.subTest(changes):
+                response = self.client.patch(url, changes, content_type='application/json')
+                self.assertEqual(response.status_code, 200)
+                self.assertCountersMatch()
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertCountersMatch()
+        self.assertEqual(self.client.delete(f'/api/categories/{self.category.pk}/').status_code, 204)
+        self.assertCountersMatch()
+
+    def test_stale_destroy_adjusts_counters_once(self):
+        stale = Transaction.objects.get(pk=self.transactions[0].pk)
+        TransactionViewSet().perform_destroy(self.transactions[0])
+        with self.assertRaises(NotFound):
+            TransactionViewSet().perform_destroy(stale)
+        self.assertCountersMatch()
+
+    def test_update_applies_changes_to_the_current_row(self):
+        txn = self.transactions[0]
+        stale = Transaction.objects.get(pk=txn.pk)
+        Transaction.objects.filter(pk=txn.pk).update(amount=Decimal('9.00'))
+        rollups.rebuild([self.user.pk])
+        budget_spend.rebuild([self.user.pk])
+        serializer = TransactionSerializer(stale, data={'date': date.today() - timedelta(days=10)}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        TransactionViewSet().perform_update(serializer)
+        self.assertEqual(Transaction.objects.get(pk=txn.pk).amount, Decimal('9.00'))
+        self.assertCountersMatch()
+
+    def test_bulk_update_and_delete(self):
+        ids = [txn.pk for txn in self.transactions]
+        response = self.client.post('/api/transactions/bulk-update/', {
+            'ids': ids, 'changes': {'amount': '2.00', 'date': str(date.today() - timedelta(days=40))},
+        }, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': 3})
+        self.assertCountersMatch()
+        response = self.client.post('/api/transactions/bulk-delete/', {'ids': ids[:2]}, content_type='application/json')
+        self.assertEqual(response.json(), {'deleted': 2})
+        self.assertCountersMatch()
+
+    def test_admin_writes_keep_counters(self):
+        txn = self.transactions[0]
+        response = self.client.post(f'/admin/api/transaction/{txn.pk}/change/', {
+            'user': self.user.pk, 'category': self.category.pk, 'amount': '7.25', 'description': '',
+            'date': str(date.today() - timedelta(days=50)), 'type': Transaction.EXPENSE,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertCountersMatch()
+        response = self.client.post(f'/admin/api/transaction/{txn.pk}/delete/', {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertCountersMatch()
+        response = self.client.post(f'/admin/api/transaction/?user={self.user.pk}', {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [self.transactions[1].pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+        self.assertCountersMatch()
+
+
+class TransactionImportTests(UserDataTestCase):
+    url = '/api/transactions/bulk/'
+
+    def setUp(self):
+        super().setUp()
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        self.salary = Category.objects.create(user=self.user, name='Salary', type=Category.INCOME)
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('100'))
+        self.client.force_login(self.user)
+
+    def test_csv_rows_are_imported_and_counted(self):
+        body = (
+            '\ufeffamount,type,date,category,category_name,description\n'
+            f'12.50,expense,{date.today()},{self.food.pk},,lunch\n'
+            f'1000,income,{date.today()},,Salary,\n'
+            f'3.25,expense,{date.today() - timedelta(days=40)},,,\n'
+        )
+        response = self.client.post(self.url, body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'created': 3, 'failed': 0, 'errors': []})
+        rows = Transaction.objects.filter(user=self.user).order_by('amount')
+        self.assertEqual(
+            [(row.amount, row.category_id, row.description) for row in rows],
+            [(Decimal('3.25'), None, ''), (Decimal('12.50'), self.food.pk, 'lunch'),
+             (Decimal('1000.00'), self.salary.pk, '')],
+        )
+        self.assertCountersMatch()
+        self.assertEqual(self.client.get('/api/financial-summary/').json()['total_expenses'], 15.75)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        body = '\n'.join([
+            f'{{"amount": "4.00", "type": "expense", "date": "{date.today()}", "category": {self.food.pk}}}',
+            '{"amount": ',
+            '[1, 2]',
+            '',
+            f'{{"amount": "abc", "type": "expense", "date": "{date.today()}"}}',
+            f'{{"amount": "4.00", "type": "income", "date": "{date.today()}", "category": {self.food.pk}}}',
+            f'{{"amount": "4.00", "type": "expense", "date": "{date.today()}", "category_name": "Rent"}}',
+        ])
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result['created'], result['failed']), (1, 5))
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3, 5, 6, 7])
+        self.assertIn('amount', result['errors'][2]['errors'])
+        self.assertIn('non_field_errors', result['errors'][3]['errors'])
+        self.assertIn('category_name', result['errors'][4]['errors'])
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+        self.assertCountersMatch()
+
+    def test_other_content_types_are_refused(self):
+        response = self.client.post(self.url, {'amount': '1.00'}, content_type='application/json')
+        self.assertEqual(response.status_code, 415)
+
+    def test_a_failed_batch_is_rolled_back_whole(self):
+        rows = parse_json_lines(BytesIO(''.join(
+            f'{{"amount": "{n}.00", "type": "expense", "date": "{date.today()}", "category": {self.food.pk}}}\n'
+            for n in range(1, 5)
+        ).encode()))
+        version = summary_cache.get_version(self.user.pk)
+        add_transactions = budget_spend.add_transactions
+        calls = []
+
+        def fail_second_batch(created):
+            calls.append(created)
+            if len(calls) == 2:
+                raise RuntimeError('boom')
+            add_transactions(created)
+
+        with mock.patch.object(budget_spend, 'add_transactions', side_effect=fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                import_transactions(self.user, rows, batch_size=2)
+        # The first batch committed; none of the second one did
+        self.assertEqual(
+            sorted(Transaction.objects.filter(user=self.user).values_list('amount', flat=True)),
+            [Decimal('1.00'), Decimal('2.00')],
+        )
+        self.assertEqual(summary_cache.get_version(self.user.pk), version + 1)
+        self.assertCountersMatch()
+
+
+class TransactionExportTests(UserDataTestCase):
+    filters = 'type=expense&category={category}&start_date={start}'
+
+    def setUp(self):
+        super().setUp()
+        self.food = Category.objects.create(user=self.user, name='Food, "fresh"', type=Category.EXPENSE)
+        rent = Category.objects.create(user=self.user, name='Rent', type=Category.EXPENSE)
+        for n in range(7):
+            create_transaction(self.user, self.food, f'{n}.05', date.today() - timedelta(days=10 * n))
+        create_transaction(self.user, rent, '900.00', date.today())
+        Transaction.objects.create(
+            user=self.user, amount=Decimal('50'), date=date.today(), type=Transaction.INCOME, description='refund',
+        )
+        self.query = self.filters.format(category=self.food.pk, start=date.today() - timedelta(days=35))
+        self.client.force_login(self.user)
+
+    def listed(self):
+        response = self.client.get(f'/api/transactions/?{self.query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_csv_export_matches_the_list(self):
+        response = self.client.get(f'/api/transactions/export/?{self.query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], EXPORT_FIELDS)
+        listed = self.listed()
+        self.assertEqual(len(rows) - 1, len(listed))
+        self.assertEqual(len(listed), 4)
+        self.assertEqual(
+            sorted(int(row[0]) for row in rows[1:]), sorted(row['id'] for row in listed),
+        )
+        self.assertEqual({row[3] for row in rows[1:]}, {'Food, "fresh"'})
+
+    def test_ndjson_export_has_the_list_fields(self):
+        response = self.client.get(f'/api/transactions/export/?{self.query}&format=ndjson')
+        self.assertEqual(response.status_code, 200)
+        exported = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        by_id = itemgetter('id')
+        self.assertEqual(sorted(exported, key=by_id), sorted(self.listed(), key=by_id))
+
+
+class AnalyticsTimeseriesTests(UserDataTestCase):
+    url = '/api/analytics/timeseries/'
+
+    def setUp(self):
+        super().setUp()
+        self.food = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        self.rent = Category.objects.create(user=self.user, name='Rent', type=Category.EXPENSE)
+        salary = Category.objects.create(user=self.user, name='Salary', type=Category.INCOME)
+        # 2024-01-01 is a Monday
+        create_transaction(self.user, self.food, '10.00', date(2024, 1, 1))
+        create_transaction(self.user, self.food, '2.50', date(2024, 1, 3))
+        create_transaction(self.user, self.rent, '500.00', date(2024, 1, 10))
+        create_transaction(self.user, self.food, '4.25', date(2024, 3, 5))
+        txn = Transaction.objects.create(
+            user=self.user, category=salary, amount=Decimal('1000'), date=date(2024, 1, 2), type=Transaction.INCOME,
+        )
+        rollups.add_transaction(txn)
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        response = self.client.get(self.url, {'amount_format': 'cents', **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def series(self, **params):
+        return [
+            (point['period'], point['income'], point['expense'], point['net'])
+            for point in self.get(**params)['series']
+        ]
+
+    def test_months_include_empty_periods(self):
+        self.assertEqual(self.series(bucket='month'), [
+            ('2024-01-01', 100000, 51250, 48750),
+            ('2024-02-01', 0, 0, 0),
+            ('2024-03-01', 0, 425, -425),
+        ])
+
+    def test_weeks_start_on_monday(self):
+        self.assertEqual(self.series(bucket='week', end_date='2024-01-21'), [
+            ('2024-01-01', 100000, 1250, 98750),
+            ('2024-01-08', 0, 50000, -50000),
+            ('2024-01-15', 0, 0, 0),
+        ])
+
+    def test_days_follow_the_requested_range(self):
+        self.assertEqual(self.series(bucket='day', start_date='2024-01-01', end_date='2024-01-04'), [
+            ('2024-01-01', 0, 1000, -1000),
+            ('2024-01-02', 100000, 0, 100000),
+            ('2024-01-03', 0, 250, -250),
+            ('2024-01-04', 0, 0, 0),
+        ])
+
+    def test_category_breakdown(self):
+        data = self.get(bucket='month', end_date='2024-02-29', breakdown='category')
+        categories = {
+            entry['category_name']: [(point['period'], point['total']) for point in entry['series']]
+            for entry in data['categories']
+        }
+        self.assertEqual(categories, {
+            'Food': [('2024-01-01', 1250), ('2024-02-01', 0)],
+            'Rent': [('2024-01-01', 50000), ('2024-02-01', 0)],
+            'Salary': [('2024-01-01', 100000), ('2024-02-01', 0)],
+        })
+        self.assertEqual([point['expense'] for point in data['series']], [51250, 0])
+
+    def test_bad_parameters_are_refused(self):
+        for params in (
+            {'bucket': 'year'},
+            {'start_date': '2024-13-01'},
+            {'bucket': 'day', 'start_date': '2000-01-01', 'end_date': '2024-01-01'},
+        ):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+class AsyncSummaryTests(UserDataTestCase):
+    routes = ['financial-summary', 'category-summary', 'budget-status']
+
+    def setUp(self):
+        super().setUp()
+        food = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        salary = Category.objects.create(user=self.user, name='Salary', type=Category.INCOME)
+        Budget.objects.create(user=self.user, category=food, amount=Decimal('100'))
+        create_transaction(self.user, food, '12.34', date.today())
+        create_transaction(self.user, food, '0.66', date.today() - timedelta(days=400))
+        txn = Transaction.objects.create(
+            user=self.user, category=salary, amount=Decimal('2000.10'), date=date.today(), type=Transaction.INCOME,
+        )
+        rollups.add_transaction(txn)
+        self.client.force_login(self.user)
+        self.async_client = AsyncClient()
+        self.async_client.cookies = self.client.cookies
+
+    def aget(self, path, **extra):
+        return async_to_sync(self.async_client.get)(path, **extra)
+
+    def test_responses_match_the_sync_views(self):
+        for route in self.routes:
+            for amount_format in ('float', 'string', 'cents'):
+                with self.subTest(route=route, amount_format=amount_format):
+                    query = f'?amount_format={amount_format}'
+                    expected = self.client.get(f'/api/{route}/{query}')
+                    response = self.aget(f'/api/async/{route}/{query}')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.json(), expected.json())
+                    self.assertEqual(self.aget(
+                        f'/api/async/{route}/{query}', headers={'If-None-Match': response['ETag']},
+                    ).status_code, 304)
+
+    def test_other_requests_are_refused(self):
+        self.assertEqual(async_to_sync(AsyncClient().get)('/api/async/financial-summary/').status_code, 403)
+        self.assertEqual(async_to_sync(self.async_client.post)('/api/async/financial-summary/').status_code, 405)
+        self.assertEqual(self.aget('/api/async/financial-summary/?amount_format=hex').status_code, 400)
+
+
+class AsyncConcurrencyTests(TransactionTestCase):
+    """Outside a transaction the gathered steps run in worker threads with their own connections."""
+    databases = '__all__'
+
+    def test_worker_threads_read_committed_data(self):
+        cache.clear()
+        user = User.objects.create(username='async')
+        with shards.pinned(shards.placement(user.pk).database):
+            category = Category.objects.create(user=user, name='Food', type=Category.EXPENSE)
+            create_transaction(user, category, '5.00', date.today())
+        self.client.force_login(user)
+        async_client = AsyncClient()
+        async_client.cookies = self.client.cookies
+        response = async_to_sync(async_client.get)('/api/async/financial-summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.client.get('/api/financial-summary/').json())
+        response = async_to_sync(async_client.get)(
+            '/api/async/financial-summary/', headers={'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class MoneyTests(SimpleTestCase):
+    def test_to_cents_rounds_half_up(self):
+        cases = [
+            (None, 0), (Decimal('12.34'), 1234), (Decimal('0.005'), 1), (Decimal('-0.005'), -1),
+            (Decimal('0.0049'), 0), (Decimal('1020.5'), 102050),
+            # SQLite returns sums of decimal columns as floats
+            (86018.0099999999, 8601801), (0.1 + 0.2, 30), (7, 700),
+        ]
+        for value, cents in cases:
+            with self.subTest(value=value):
+                self.assertEqual(to_cents(value), cents)
+
+    def test_formats(self):
+        cases = [
+            (0, 0, '0.00', 0.0), (5, 5, '0.05', 0.05), (-5, -5, '-0.05', -0.05),
+            (-102050, -102050, '-1020.50', -1020.5), (123456789, 123456789, '1234567.89', 1234567.89),
+        ]
+        for cents, *expected in cases:
+            with self.subTest(cents=cents):
+                self.assertEqual([format_cents(cents, fmt) for fmt in ('cents', 'string', 'float')], expected)
+                self.assertIsInstance(format_cents(cents, 'cents'), int)
+
+    def test_parse_amount_format(self):
+        self.assertEqual(parse_amount_format(None), 'float')
+        self.assertEqual(parse_amount_format(''), 'float')
+        self.assertEqual(parse_amount_format('string'), 'string')
+        with self.assertRaises(ValueError):
+            parse_amount_format('hex')
+
+
+class AmountFormatTests(UserDataTestCase):
+    def test_summary_amounts_in_each_format(self):
+        food = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        for amount in ('0.10', '0.20', '1019.95', '0.25'):
+            create_transaction(self.user, food, amount, date.today())
+        self.client.force_login(self.user)
+        expected = {
+            'cents': (0, 102050, -102050),
+            'string': ('0.00', '1020.50', '-1020.50'),
+            'float': (0.0, 1020.5, -1020.5),
+        }
+        for amount_format, amounts in expected.items():
+            with self.subTest(amount_format):
+                data = self.client.get(f'/api/financial-summary/?amount_format={amount_format}').json()
+                self.assertEqual((data['total_income'], data['total_expenses'], data['balance']), amounts)
+                rows = self.client.get(f'/api/category-summary/?amount_format={amount_format}').json()
+                self.assertEqual(rows['category_summary'][0]['total'], amounts[1])
+        self.assertEqual(self.client.get('/api/financial-summary/?amount_format=hex').status_code, 400)
+
+
+class LeanListTests(UserDataTestCase):
+    """The lean list path renders exactly the bytes of the serializer path."""
+
+    def setUp(self):
+        super().setUp()
+        food = Category.objects.create(user=self.user, name='Café \u2028 "Food"', type=Category.EXPENSE)
+        Budget.objects.create(user=self.user, category=food, amount=Decimal('1234.5'), period=Budget.WEEKLY)
+        for n, amount in enumerate(['0.10', '99999999.99', '12', '7.05'] * 3):
+            category = None if n % 2 else food
+            Transaction.objects.create(
+                user=self.user, category=category, amount=Decimal(amount), date=date(2024, 2, 29),
+                type=Transaction.EXPENSE, description='naïve \u2029 <b>',
+            )
+        self.client.force_login(self.user)
+
+    def serializer_path(self, url):
+        with mock.patch.object(LeanListMixin, 'list', ListModelMixin.list), \
+                mock.patch.object(APIView, 'renderer_classes', [JSONRenderer]):
+            return self.client.get(url)
+
+    def test_lean_lists_match_the_serializer_output(self):
+        urls = (
+            '/api/transactions/', '/api/transactions/?page=2', '/api/transactions/?pagination=cursor&page_size=5',
+            '/api/budgets/', '/api/categories/',
+        )
+        for url in urls:
+            with self.subTest(url):
+                lean = self.client.get(url)
+                expected = self.serializer_path(url)
+                self.assertEqual(lean.status_code, 200)
+                self.assertEqual(lean.content, expected.content)
+        self.assertIn(b'"category":null', self.client.get('/api/transactions/').content)
+
+
+class SearchTests(UserDataTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        self.txns = {
+            description: self.post({'description': description})
+            for description in ('Starbucks coffee', 'Coffee beans', 'Rent')
+        }
+
+    def post(self, fields):
+        self.client.force_login(self.user)
+        response = self.client.post('/api/transactions/', {
+            'category': self.category.pk, 'amount': '4.00', 'date': str(date.today()),
+            'type': Transaction.EXPENSE, **fields,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def search(self, query):
+        response = self.client.get('/api/transactions/', {'search': query})
+        return {row['description'] for row in response.json()['results']}
+
+    def test_every_word_matches_as_a_prefix(self):
+        self.assertEqual(search.backend(self.database), 'sqlite')
+        self.assertEqual(self.search('star coff'), {'Starbucks coffee'})
+        self.assertEqual(self.search('coffee'), {'Starbucks coffee', 'Coffee beans'})
+        self.assertEqual(self.search('tea'), set())
+
+    def test_updates_are_indexed(self):
+        response = self.client.patch(
+            f"/api/transactions/{self.txns['Rent']}/", {'description': 'Tea leaves'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/transactions/bulk-update/', {
+            'ids': [self.txns['Coffee beans']], 'changes': {'description': 'Green tea'},
+        }, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': 1})
+        self.assertEqual(self.search('rent'), set())
+        self.assertEqual(self.search('coffee'), {'Starbucks coffee'})
+        self.assertEqual(self.search('tea'), {'Tea leaves', 'Green tea'})
+        self.assert_index_in_step()
+
+    def test_bulk_deletes_are_removed_from_the_index(self):
+        response = self.client.post('/api/transactions/bulk-delete/', {
+            'ids': [self.txns['Starbucks coffee']],
+        }, content_type='application/json')
+        self.assertEqual(response.json(), {'deleted': 1})
+        self.assertEqual(self.search('coffee'), {'Coffee beans'})
+        self.assertEqual(self.search('starbucks'), set())
+        self.assert_index_in_step()
+
+    def assert_index_in_step(self):
+        # Raises if the FTS index disagrees with api_transaction
+        with connections[self.database].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+
+
+class ArchiveTests(UserDataTestCase):
+    SUMMARIES = (
+        '/api/financial-summary/', '/api/category-summary/', '/api/budget-status/',
+        '/api/analytics/timeseries/?bucket=month&breakdown=category', '/api/dashboard/?fields=financial_summary',
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        Budget.objects.create(user=self.user, category=self.category, amount=Decimal('100'), period=Budget.YEARLY)
+        self.old = [
+            create_transaction(self.user, self.category, amount, date(2020, month, 15)).pk
+            for month, amount in ((1, '10.10'), (2, '0.20'), (3, '7.00'))
+        ]
+        create_transaction(self.user, None, '3.30', date(2020, 3, 31))
+        self.recent = create_transaction(self.user, self.category, '2.50', date.today()).pk
+        self.client.force_login(self.user)
+
+    def summaries(self):
+        responses = {url: self.client.get(url) for url in self.SUMMARIES}
+        self.assertEqual({response.status_code for response in responses.values()}, {200})
+        return {url: response.json() for url, response in responses.items()}
+
+    def listed(self, query=''):
+        return sorted(row['id'] for row in self.client.get(f'/api/transactions/{query}').json()['results'])
+
+    def test_summaries_are_unchanged(self):
+        self.assertGreater(snapshots.take([self.user.pk]), 0)
+        before = self.summaries()
+        self.assertEqual(archive.archive([self.user.pk], before=date(2021, 1, 1), batch_size=2), 4)
+        self.assertEqual(self.summaries(), before)
+        self.assertCountersMatch()
+        self.assertEqual(snapshots.verify([self.user.pk]), [])
+        self.assertEqual(list(Transaction.objects.filter(user=self.user).values_list('pk', flat=True)), [self.recent])
+
+    def test_archived_rows_are_listed_only_with_the_flag(self):
+        archive.archive([self.user.pk], before=date(2020, 3, 1))
+        self.assertEqual(self.listed(), sorted(Transaction.objects.filter(user=self.user).values_list('pk', flat=True)))
+        self.assertEqual(self.listed('?archived=true'), self.old[:2])
+        self.assertEqual(self.client.get(f'/api/transactions/{self.old[0]}/').status_code, 404)
+        response = self.client.get(f'/api/transactions/{self.old[0]}/?archived=true')
+        self.assertEqual(response.json()['amount'], '10.10')
+        self.assertEqual(
+            self.client.patch(f'/api/transactions/{self.old[0]}/?archived=true', {'amount': '1.00'},
+                              content_type='application/json').status_code,
+            404,
+        )
+
+    def test_snapshots_follow_backdated_writes(self):
+        self.assertGreater(snapshots.take([self.user.pk]), 0)
+        self.assertEqual(snapshots.take([self.user.pk]), 0)
+        self.assertEqual(snapshots.verify([self.user.pk]), [])
+        response = self.client.post('/api/transactions/', {
+            'category': self.category.pk, 'amount': '0.10', 'date': '2020-02-01', 'type': Transaction.EXPENSE,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(snapshots.verify([self.user.pk]), [])
+        self.assertGreater(snapshots.take([self.user.pk]), 0)
+        self.assertEqual(snapshots.verify([self.user.pk]), [])
+        self.assertEqual(self.client.get('/api/financial-summary/').json()['total_expenses'], 23.2)
+
+        BalanceSnapshot.objects.filter(user=self.user, category=self.category).update(total=Decimal('1'))
+        self.assertTrue(snapshots.verify([self.user.pk]))
+
+
+@override_settings(SHARD_DATABASES=[], REPLICA_STICKY_SECONDS=60)
+class ReplicaTests(UserDataTestCase):
+    """The ``test_replica`` database stands in for a replica that has not caught up yet."""
+    REPLICA = 'test_replica'
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(routers, 'REPLICA_ALIAS', self.REPLICA)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        create_transaction(self.user, category, '5.00', date.today())
+        for model in (Category, Transaction, DailyRollup, DataVersion):
+            model.objects.using(self.REPLICA).bulk_create(model.objects.filter(user=self.user))
+        # Not replicated yet
+        create_transaction(self.user, category, '4.00', date.today())
+        self.client.force_login(self.user)
+
+    def age_writes(self):
+        DataVersion.objects.filter(user=self.user).update(modified=datetime.now(timezone.utc) - timedelta(minutes=5))
+
+    def read(self):
+        return (
+            self.client.get('/api/financial-summary/').json()['total_expenses'],
+            len(self.client.get('/api/transactions/').json()['results']),
+        )
+
+    def test_reads_use_the_replica_once_writes_are_old(self):
+        self.age_writes()
+        with CaptureQueriesContext(connections[self.REPLICA]) as queries:
+            self.assertEqual(self.read(), (5.0, 1))
+        self.assertTrue(queries)
+
+    def test_recent_writers_read_from_the_primary(self):
+        with CaptureQueriesContext(connections[self.REPLICA]) as queries:
+            self.assertEqual(self.read(), (9.0, 2))
+        self.assertEqual(len(queries), 0)
+
+    def test_the_data_version_is_read_from_the_primary(self):
+        self.age_writes()
+        request = RequestFactory().get('/api/financial-summary/')
+        request.user = self.user
+        primary = DataVersion.objects.get(user=self.user).version
+        self.assertNotEqual(DataVersion.objects.using(self.REPLICA).get(user=self.user).version, primary)
+        with routers.reading_from_replica(request) as use, \
+                CaptureQueriesContext(connections[self.REPLICA]) as queries:
+            self.assertTrue(use)
+            self.assertEqual(summary_cache.get_version(self.user.id), primary)
+            self.client.get('/api/financial-summary/')
+        self.assertFalse([query for query in queries if 'api_dataversion' in query['sql']])
+
+    def test_writes_go_to_the_primary(self):
+        self.age_writes()
+        request = RequestFactory().get('/api/transactions/')
+        request.user = self.user
+        with routers.reading_from_replica(request):
+            txn = Transaction.objects.get(user=self.user)
+            self.assertEqual(txn._state.db, self.REPLICA)
+            txn.description = 'Lunch'
+            txn.save()
+            Category.objects.create(user=self.user, name='Rent', type=Category.EXPENSE)
+        self.assertEqual(Transaction.objects.get(pk=txn.pk).description, 'Lunch')
+        self.assertEqual(Transaction.objects.using(self.REPLICA).get(pk=txn.pk).description, '')
+        self.assertTrue(Category.objects.filter(name='Rent').exists())
+        self.assertFalse(Category.objects.using(self.REPLICA).filter(name='Rent').exists())
+
+
+class KeysetPaginationTests(UserDataTestCase):
+    def test_pages_cover_every_row_once(self):
+        category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        expected = [
+            create_transaction(self.user, category, '1.00', date(2024, 1, 1) + timedelta(days=n % 4)).pk
+            for n in range(23)
+        ]
+        # Ties on date and created_at are broken by id
+        Transaction.objects.filter(pk__in=expected[::2]).update(created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.client.force_login(self.user)
+        seen = []
+        url = '/api/transactions/?pagination=cursor&page_size=5'
+        while url:
+            page = self.client.get(url).json()
+            seen += [row['id'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(sorted(seen), sorted(expected))
+        self.assertEqual(seen, list(Transaction.objects.filter(user=self.user).order_by(
+            '-date', '-created_at', '-id',
+        ).values_list('pk', flat=True)))
+
+
+@override_settings(THROTTLE_ENABLED=False)
+class QueryCountTests(TestCase):
+    """Every api endpoint issues the same number of queries whatever the number of rows (no N+1)."""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+
+    def seed(self, username, rows):
+        """Create a user with ``rows`` objects of each kind; return a logged-in client, their database and ids."""
+        user = User.objects.create(username=username)
+        database = shards.placement(user.pk).database
+        with shards.pinned(database):
+            for n in range(rows):
+                category = Category.objects.create(user=user, name=f'category-{n}', type=Category.EXPENSE)
+                budget = Budget.objects.create(user=user, category=category, amount=Decimal('100'))
+                txn = create_transaction(user, category, '12.50', date.today() - timedelta(days=n))
+        client = Client()
+        client.force_login(user)
+        return client, database, {'category': category.id, 'budget': budget.id, 'transaction': txn.id}
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        small_client, small_database, small_ids = self.seed('query-count-small', 2)
+        counts = {}
+        for name, url in QUERY_COUNT_SCENARIOS:
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as default_queries, \
+                    CaptureQueriesContext(connections[small_database]) as data_queries:
+                response = small_client.get(url.format(**small_ids))
+            self.assertEqual(response.status_code, 200, name)
+            # Both contexts see the queries when the user's data is on default
+            counts[name] = (len(default_queries), len(data_queries) if small_database != DEFAULT_DB_ALIAS else 0)
+
+        large_client, large_database, large_ids = self.seed('query-count-large', 25)
+        for name, url in QUERY_COUNT_SCENARIOS:
+            default_count, data_count = counts[name]
+            with self.subTest(name), ExitStack() as stack:
+                stack.enter_context(self.assertNumQueries(default_count, using=DEFAULT_DB_ALIAS))
+                if large_database != DEFAULT_DB_ALIAS:
+                    stack.enter_context(self.assertNumQueries(data_count, using=large_database))
+                self.assertEqual(large_client.get(url.format(**large_ids)).status_code, 200)
+
+
+class RequestMetricsTests(UserDataTestCase):
+    def queries(self, response):
+        timing = response['Server-Timing']
+        return int(timing[timing.index('desc="') + 6:].split(' ', 1)[0])
+
+    def test_counts_queries_under_wsgi_and_asgi(self):
+        create_transaction(self.user, None, '3.00', date.today())
+        self.client.force_login(self.user)
+        self.client.get('/api/transactions/')
+        # Both requests after the first find any session and user caches warm
+        expected = self.queries(self.client.get('/api/transactions/'))
+        self.assertGreater(expected, 0)
+        async_client = AsyncClient()
+        async_client.cookies = self.client.cookies
+        response = async_to_sync(async_client.get)('/api/transactions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.queries(response), expected)
+
+    def test_aggregates_are_kept_without_log_lines(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        logger = logging.getLogger('api.metrics')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+        self.client.force_login(self.user)
+        with mock.patch.object(logger, 'info') as info:
+            self.assertEqual(self.client.get('/api/transactions/').status_code, 200)
+        info.assert_not_called()
+        self.assertEqual(metrics.snapshot()['GET transaction-list']['requests'], 1)
+        self.assertIn('GET transaction-list', self.client.get('/api/metrics/').content.decode())
+
+
+class DataVersionTests(UserDataTestCase):
+    def test_write_in_another_worker_changes_the_etag(self):
+        category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        self.client.force_login(self.user)
+        response = self.client.get('/api/financial-summary/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/financial-summary/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Another worker, with its own local-memory cache, takes the write
+        other_worker = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-worker',
+        }}
+        with override_settings(CACHES=other_worker):
+            response = self.client.post('/api/transactions/', {
+                'category': category.pk, 'amount': '4.00', 'date': str(date.today()), 'type': Transaction.EXPENSE,
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.get('/api/financial-summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_expenses'], 4.0)
+
+    def test_if_modified_since_does_not_hide_a_write_in_the_same_second(self):
+        category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+        self.client.force_login(self.user)
+        self.assertIn('Last-Modified', self.client.get('/api/financial-summary/'))
+        create_transaction(self.user, category, '4.00', date.today())
+        # Later than the write's Last-Modified, which is truncated to the second
+        response = self.client.get('/api/financial-summary/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_expenses'], 4.0)
+
+    def test_the_data_version_is_read_once_per_request(self):
+        self.client.force_login(self.user)
+        for url in ('/api/dashboard/', '/api/async/financial-summary/'):
+            with self.subTest(url), CaptureQueriesContext(connections[self.database]) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            reads = [query for query in queries if 'FROM "api_dataversion"' in query['sql']]
+            self.assertEqual(len(reads), 1, reads)
+
+
+# The configured shards, or the two test databases settings adds without DB_SHARDS
+TEST_SHARDS = settings.SHARD_DATABASES or ['shard1', 'shard2']
+
+
+@override_settings(SHARD_DATABASES=TEST_SHARDS)
+class ShardTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        for database in settings.SHARD_DATABASES:
+            shards.reserve_ids(database)
+        self.user = User.objects.create(username='sharded')
+        self.source = shards.placement(self.user.pk).database
+        self.target = next(database for database in settings.SHARD_DATABASES if database != self.source)
+        with shards.pinned(self.source):
+            self.category = Category.objects.create(user=self.user, name='Food', type=Category.EXPENSE)
+            Budget.objects.create(user=self.user, category=self.category, amount=Decimal('100'))
+            for n in range(3):
+                create_transaction(self.user, self.category, '5.00', date.today() - timedelta(days=n))
+        self.client.force_login(self.user)
+
+    def rows(self, database):
+        return {
+            model._meta.label: list(shards._user_rows(model, self.user.pk, database).order_by('pk').values())
+            for model in shards.SHARDED_MODELS
+        }
+
+    def post_transaction(self):
+        return self.client.post('/api/transactions/', {
+            'category': self.category.pk, 'amount': '4.00', 'date': str(date.today()), 'type': Transaction.EXPENSE,
+        }, content_type='application/json')
+
+    def test_requests_use_the_home_shard(self):
+        self.assertEqual(self.source, shards.home_shard(self.user.pk))
+        response = self.post_transaction()
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Transaction.objects.using(self.source).filter(pk=response.json()['id']).exists())
+        self.assertFalse(Transaction.objects.using(DEFAULT_DB_ALIAS).filter(user=self.user).exists())
+        self.assertTrue(DataVersion.objects.using(self.source).filter(user=self.user).exists())
+        self.assertEqual(len(self.client.get('/api/transactions/').json()['results']), 4)
+
+    def test_ids_come_from_the_shard_range(self):
+        start = (settings.SHARD_DATABASES.index(self.source) + 1) * shards.SHARD_ID_SPAN
+        for model in (Category, Budget, Transaction):
+            for pk in model.objects.using(self.source).filter(user=self.user).values_list('pk', flat=True):
+                self.assertGreaterEqual(pk, start)
+                self.assertLess(pk, start + shards.SHARD_ID_SPAN)
+
+    def test_move_keeps_rows_and_purges_the_source(self):
+        before = self.rows(self.source)
+        moved = shards.move_users({self.user.pk: self.target}, grace=0)
+        self.assertEqual([move[:3] for move in moved], [(self.user.pk, self.source, self.target)])
+        self.assertEqual(self.rows(self.target), before)
+        self.assertEqual(self.rows(self.source), {label: [] for label in before})
+        self.assertEqual(shards.load_placement(self.user.pk), shards.Placement(self.target, ''))
+
+        ids = [row['id'] for row in before['api.Transaction']]
+        listed = [row['id'] for row in self.client.get('/api/transactions/').json()['results']]
+        self.assertEqual(sorted(listed), ids)
+        self.assertEqual(self.post_transaction().status_code, 201)
+        with shards.pinned(self.target):
+            self.assertEqual(rollups.verify([self.user.pk]), [])
+            self.assertEqual(budget_spend.verify([self.user.pk]), [])
+
+    def test_purge_deletes_only_the_users_rows(self):
+        neighbour = User.objects.create(username='neighbour')
+        with shards.pinned(self.source):
+            kept = Category.objects.create(user=neighbour, name='Rent', type=Category.EXPENSE)
+        before = self.rows(self.source)
+        deleted = shards.purge_user(self.user.pk, self.source)
+        self.assertEqual(deleted, sum(len(rows) for rows in before.values()))
+        self.assertEqual(self.rows(self.source), {label: [] for label in before})
+        self.assertTrue(Category.objects.using(self.source).filter(pk=kept.pk).exists())
+
+    def test_admin_works_on_the_owners_shard(self):
+        admin_user = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        self.assertNotEqual(shards.placement(admin_user.pk).database, self.source)
+        self.client.force_login(admin_user)
+        fields = {
+            'user': self.user.pk, 'category': self.category.pk, 'amount': '7.25', 'description': '',
+            'date': str(date.today() - timedelta(days=50)), 'type': Transaction.EXPENSE,
+        }
+
+        response = self.client.get(f'/admin/api/transaction/?user={self.user.pk}')
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertEqual(self.client.post('/admin/api/transaction/add/', fields).status_code, 302)
+        added = Transaction.objects.using(self.source).get(user=self.user, amount=Decimal('7.25'))
+        self.assertFalse(Transaction.objects.using(DEFAULT_DB_ALIAS).exists())
+
+        url = f'/admin/api/transaction/{added.pk}/'
+        self.assertEqual(self.client.get(f'{url}change/').status_code, 200)
+        self.assertEqual(self.client.post(f'{url}change/', {**fields, 'amount': '8.00'}).status_code, 302)
+        self.assertEqual(Transaction.objects.using(self.source).get(pk=added.pk).amount, Decimal('8.00'))
+        self.assertEqual(self.client.post(f'{url}delete/', {'post': 'yes'}).status_code, 302)
+        response = self.client.post(f'/admin/api/transaction/?user={self.user.pk}', {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': list(Transaction.objects.using(self.source).values_list('pk', flat=True)[:1]),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Transaction.objects.using(self.source).filter(user=self.user).count(), 2)
+        with shards.pinned(self.source):
+            self.assertEqual(rollups.verify([self.user.pk]), [])
+            self.assertEqual(budget_spend.verify([self.user.pk]), [])
+
+    def test_writes_are_refused_while_moving(self):
+        shards.set_placement(self.user.pk, self.source, self.target)
+        self.assertEqual(self.post_transaction().status_code, 503)
+        self.assertEqual(self.client.get('/api/transactions/').status_code, 200)
+        self.assertEqual(Transaction.objects.using(self.source).filter(user=self.user).count(), 3)
+
+
+class SharedCacheCheckTests(TestCase):
+    cached_sessions = 'django.contrib.sessions.backends.cached_db'
+
+    def error_ids(self):
+        return [error.id for error in check_shared_caches(None)]
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db', USER_CACHE_TIMEOUT=0)
+    def test_database_sessions_pass(self):
+        self.assertEqual(self.error_ids(), [])
+
+    @override_settings(SESSION_ENGINE=cached_sessions, USER_CACHE_TIMEOUT=60)
+    def test_local_memory_cache_fails(self):
+        self.assertEqual(self.error_ids(), ['api.E001', 'api.E002'])
+
+    @override_settings(
+        SESSION_ENGINE=cached_sessions, USER_CACHE_TIMEOUT=60,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}},
+    )
+    def test_shared_cache_passes(self):
+        self.assertEqual(self.error_ids(), [])
+
+
+@override_settings(THROTTLE_ENABLED=True, REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 0})
+class AuthThrottleTests(TestCase):
+    def test_forwarded_for_header_does_not_pick_the_bucket(self):
+        statuses = [
+            self.client.post(
+                '/api/auth/register/', {}, content_type='application/json',
+                REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR=f'198.51.100.{n}',
+            ).status_code
+            for n in range(25)
+        ]
+        self.assertEqual(statuses.count(429), 5)
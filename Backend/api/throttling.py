@@ -0,0 +1,157 @@
+"""
+Request throttling
+
+Token-bucket rate limits, checked by DRF before the view runs so an
+over-budget request is answered with 429 and a ``Retry-After`` header
+without doing the expensive work (PBKDF2 in login and register,
+aggregates in the summary endpoints).
+
+Each bucket holds up to N tokens for a rate of ``'N/period'`` and
+refills continuously at N per period, so clients may burst up to N
+requests and then continue at the sustained rate. Rates come from
+``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``:
+
+- ``auth-ip``: login and register attempts per client IP
+- ``auth-user``: login attempts per username, whatever the IP
+- ``summary``: summary, budget history, dashboard and time-series requests
+  per user
+
+Bucket state lives in Django's cache framework (``THROTTLE_CACHE_ALIAS``).
+Updates are atomic within a process; across processes sharing a cache a
+concurrent burst can overshoot a bucket by a few requests. With the
+locmem default each worker keeps its own buckets, so configure a shared
+cache to enforce the limits across workers. Set ``THROTTLE_ENABLED=False``
+to turn throttling off.
+
+Client IPs are DRF's ``get_ident``: ``REMOTE_ADDR``, or the address the
+last of ``NUM_PROXIES`` trusted proxies put in ``X-Forwarded-For``. The
+default of 0 ignores the header, which clients can set to anything.
+
+Allowed and throttled counts are kept per process.
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def parse_rate(rate):
+    """Return ``(tokens, seconds)`` for a rate such as ``'10/min'``, or None."""
+    if rate is None:
+        return None
+    tokens, period = rate.split('/')
+    return int(tokens), PERIODS[period[0]]
+
+
+def get_rate(scope):
+    """Return the parsed rate of ``scope``, or None if it is not limited."""
+    if not getattr(settings, 'THROTTLE_ENABLED', True):
+        return None
+    return parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+
+
+def take(scope, ident):
+    """
+    Take one token from the ``scope`` bucket of ``ident``. Returns None if
+    the request may proceed, or the seconds until a token is available.
+    """
+    rate = get_rate(scope)
+    if rate is None:
+        return None
+    capacity, period = rate
+    refill = capacity / period
+    digest = hashlib.blake2b(str(ident).encode(), digest_size=16).hexdigest()
+    key = f'throttle:{scope}:{digest}'
+    cache = _cache()
+    with _lock:
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens >= 1:
+            tokens -= 1
+            wait = None
+        else:
+            wait = (1 - tokens) / refill
+        # A bucket untouched for a whole period is full again, so the entry
+        # may expire then.
+        cache.set(key, (tokens, now), timeout=period)
+        _stats[scope, 'throttled' if wait else 'allowed'] += 1
+    return wait
+
+
+def stats():
+    """Return allowed/throttled counts per scope for this process."""
+    with _lock:
+        items = list(_stats.items())
+    result = {}
+    for (scope, outcome), count in items:
+        result.setdefault(scope, {'allowed': 0, 'throttled': 0})[outcome] = count
+    return result
+
+
+def retry_after(wait):
+    """Format a wait from ``take`` as whole seconds for Retry-After."""
+    return max(1, math.ceil(wait))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle drawing from the ``scope`` bucket of the identity
+    returned by ``get_ident_for``; requests without one are not limited.
+    """
+    scope = None
+
+    def get_ident_for(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_for(request)
+        self._wait = None if ident is None else take(self.scope, ident)
+        return self._wait is None
+
+    def wait(self):
+        return retry_after(self._wait)
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Login and registration attempts per client IP."""
+    scope = 'auth-ip'
+
+    def get_ident_for(self, request):
+        return self.get_ident(request)
+
+
+class LoginUserThrottle(TokenBucketThrottle):
+    """Login attempts per username, so spreading them over IPs does not help."""
+    scope = 'auth-user'
+
+    def get_ident_for(self, request):
+        try:
+            username = json.loads(request.body).get('username')
+        except (ValueError, AttributeError):
+            return None
+        return username.lower() if isinstance(username, str) and username else None
+
+
+class SummaryUserThrottle(TokenBucketThrottle):
+    """Summary, budget history, dashboard and time-series requests per user."""
+    scope = 'summary'
+
+    def get_ident_for(self, request):
+        return request.user.pk if request.user.is_authenticated else self.get_ident(request)
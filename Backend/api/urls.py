@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from . import async_views
 from . import auth_views
 
 class DocumentedRouter(DefaultRouter):
@@ -19,6 +20,8 @@ class DocumentedRouter(DefaultRouter):
         - financial-summary: Income, expenses, and balance totals for the user.
         - category-summary: Aggregated totals grouped by category.
         - budget-status: Budget vs actuals for current period.
+        - dashboard: All of the above plus the first transactions page in one call.
+        - analytics/timeseries: Income/expense/net bucketed by day, week or month.
 
         Use the Browsable API to explore, or send JSON using your client.
         """
@@ -36,6 +39,18 @@ urlpatterns = [
     path('financial-summary/', views.financial_summary, name='financial-summary'),
     path('category-summary/', views.category_summary, name='category-summary'),
     path('budget-status/', views.budget_status, name='budget-status'),
+    path('budget-history/', views.budget_history_list, name='budget-history-list'),
+    path('dashboard/', views.dashboard, name='dashboard'),
+
+    path('analytics/timeseries/', views.analytics_timeseries, name='analytics-timeseries'),
+    path('metrics/', views.request_metrics, name='metrics'),
+    path('summary-cache-stats/', views.summary_cache_stats, name='summary-cache-stats'),
+    path('throttle-stats/', views.throttle_stats, name='throttle-stats'),
+    
+    # Async (ASGI) variants of the summary endpoints
+    path('async/financial-summary/', async_views.financial_summary, name='async-financial-summary'),
+    path('async/category-summary/', async_views.category_summary, name='async-category-summary'),
+    path('async/budget-status/', async_views.budget_status, name='async-budget-status'),
     
     # Authentication endpoints
     path('auth/login/', auth_views.login_view, name='login'),
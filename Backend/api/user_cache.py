@@ -0,0 +1,59 @@
+"""
+User cache
+
+Short-lived cache of authenticated ``User`` rows, so resolving
+``request.user`` from a session does not query ``auth_user`` on every
+request. ``CachedModelBackend`` serves ``get_user`` from Django's cache
+framework (``USER_CACHE_ALIAS``) for ``USER_CACHE_TIMEOUT`` seconds;
+``0`` turns the cache off.
+
+Entries are dropped when the user is saved or deleted (which covers
+password changes made with ``set_password`` + ``save``, and the
+``last_login`` update on login) and when the user logs out (see
+``api.signals``). Django still checks the session's auth hash against
+the cached user's password on every request, so a password change ends
+other sessions as soon as the entry is dropped. Writes that bypass model
+signals (``QuerySet.update``) are picked up when the entry expires.
+
+Together with the ``cached_db`` session engine this removes both the
+session and the user query from a typical authenticated request
+(``python manage.py benchmark_auth`` measures it). Both need a cache
+shared by all workers; ``api.checks`` rejects them with the local-memory
+cache, and ``USER_CACHE_TIMEOUT`` defaults to 0 there.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 60)
+
+
+def _key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate(user_id):
+    """Drop the cached user row for ``user_id``."""
+    _cache().delete(_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose ``get_user`` is served from the user cache."""
+
+    def get_user(self, user_id):
+        timeout = _timeout()
+        if not timeout:
+            return super().get_user(user_id)
+        cache = _cache()
+        user = cache.get(_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(_key(user_id), user, timeout)
+        return user
@@ -1,11 +1,48 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.db.models import Sum, Q
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from copy import copy
+from datetime import date
+from django.db import transaction
+from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.utils import timezone
-from .models import Category, Transaction, Budget
-from .serializers import CategorySerializer, TransactionSerializer, BudgetSerializer
+from .models import ArchivedTransaction, Category, Transaction, Budget
+from . import budget_spend, metrics, rollups, shards, summary_cache, throttling
+from .analytics import BUCKETS, format_timeseries, timeseries
+from .budgets import budget_history, evaluate_budgets, format_history, format_status, parse_history_periods
+from .bulk import delete_transactions, update_transactions
+from .conditional import ConditionalGetMixin, conditional
+from .exports import stream_transactions
+from .imports import CategoryCache, import_transactions, parse_csv, parse_json_lines
+from .listing import (
+    BUDGET_COLUMNS, CATEGORY_COLUMNS, TRANSACTION_COLUMNS, LeanListMixin, build_rows, values_queryset,
+)
+from .money import parse_amount_format
+from .pagination import KeysetPagination, TransactionPagination
+from .parsers import CSVStreamParser, JSONLinesStreamParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .routers import ReplicaReadMixin, replica_reads
+from .search import search_transactions
+from .summaries import (
+    category_totals, financial_totals, financial_totals_from_categories, format_categories, format_financial,
+)
+from .throttling import SummaryUserThrottle
+from .serializers import (
+    CategorySerializer, TransactionSerializer, BudgetSerializer,
+    TransactionBulkUpdateSerializer, TransactionSelectionSerializer,
+)
+
+
+# Columns loaded for detail and write views: exactly what the serializers render
+TRANSACTION_FIELDS = (
+    'id', 'user', 'category__name', 'amount', 'description', 'date', 'type', 'created_at',
+)
+BUDGET_FIELDS = (
+    'id', 'user', 'category__name', 'category__type', 'amount', 'period', 'start_date', 'created_at',
+)
 
 
 @api_view(['GET'])
@@ -26,7 +63,7 @@ def health_check(request):
     }, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, ReplicaReadMixin, LeanListMixin, viewsets.ModelViewSet):
     """
     Categories
 
@@ -40,6 +77,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
     """
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    list_columns = CATEGORY_COLUMNS
     
     def get_queryset(self):
         """Return categories belonging to the authenticated user only."""
@@ -50,7 +88,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(ConditionalGetMixin, ReplicaReadMixin, LeanListMixin, viewsets.ModelViewSet):
     """
     Transactions
 
@@ -68,46 +106,186 @@ class TransactionViewSet(viewsets.ModelViewSet):
     - category: category id
     - start_date: YYYY-MM-DD (inclusive)
     - end_date: YYYY-MM-DD (inclusive)
+    - search: words matched as prefixes against the description through
+      the full-text index; results are ordered by relevance (newest first
+      in cursor mode)
+    - archived: "true" to list, retrieve or export transactions moved to
+      the archive (read-only) instead of the recent ones
+
+    Pagination:
+    - page: page number (default mode)
+    - pagination=cursor or cursor=<token>: keyset pagination, newest first
+    - page_size: rows per keyset page (capped)
+    - include_count=true: include the total count in keyset mode
 
     Authentication: Requires an authenticated session.
     """
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionPagination
+    list_columns = TRANSACTION_COLUMNS
     
     def get_queryset(self):
-        """Return the user's transactions with optional filters applied."""
-        queryset = Transaction.objects.filter(user=self.request.user)
-        
-        # Filter by type
-        transaction_type = self.request.query_params.get('type', None)
-        if transaction_type:
-            queryset = queryset.filter(type=transaction_type)
-        
-        # Filter by category
-        category_id = self.request.query_params.get('category', None)
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        
-        # Filter by date range
-        start_date = self.request.query_params.get('start_date', None)
-        end_date = self.request.query_params.get('end_date', None)
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
+        """Return the user's transactions (or archived ones) with optional filters applied."""
+        model = ArchivedTransaction if self.archived() else Transaction
+        # Join the category so category_name does not cost a query per row
+        queryset = model.objects.filter(user=self.request.user).select_related(
+            'category'
+        ).only(*TRANSACTION_FIELDS)
+        queryset = filter_transactions(queryset, self.request.query_params)
         
+        query = self.request.query_params.get('search', None)
+        if query:
+            queryset = search_transactions(queryset, query)
         return queryset
     
+    def archived(self):
+        """Whether a read asks for archived transactions (see ``api.archive``)."""
+        return self.action in ('list', 'retrieve', 'export') and (
+            self.request.query_params.get('archived', '').lower() in ('1', 'true', 'yes')
+        )
+    
     def perform_create(self, serializer):
-        """Assign the authenticated user when creating a transaction."""
-        serializer.save(user=self.request.user)
-
-
-class BudgetViewSet(viewsets.ModelViewSet):
+        """Assign the authenticated user and record the transaction in its rollup and budget counters."""
+        with transaction.atomic(using=shards.data_db()):
+            instance = serializer.save(user=self.request.user)
+            rollups.add_transaction(instance)
+            budget_spend.add_transaction(instance)
+    
+    def perform_update(self, serializer):
+        """Save changes and move the transaction's amount between rollups and budget counters."""
+        with transaction.atomic(using=shards.data_db()):
+            # Apply the changes to the locked row, not the copy loaded
+            # before validation, which a concurrent write may have changed
+            serializer.instance = self.lock(serializer.instance)
+            previous = copy(serializer.instance)
+            instance = serializer.save()
+            rollups.remove_transaction(previous)
+            rollups.add_transaction(instance)
+            budget_spend.move_transaction(previous, instance)
+    
+    def perform_destroy(self, instance):
+        """Delete the transaction and remove it from its rollup and budget counters."""
+        with transaction.atomic(using=shards.data_db()):
+            previous = self.lock(instance)
+            deleted, _ = previous.delete()
+            # A concurrent delete of the same row already adjusted them
+            if deleted:
+                rollups.remove_transaction(previous)
+                budget_spend.remove_transaction(previous)
+    
+    def lock(self, instance):
+        """Lock ``instance``'s row and return its current state; 404 if it was deleted meanwhile."""
+        current = Transaction.objects.select_for_update(of=('self',)).select_related('category').filter(
+            pk=instance.pk,
+        ).first()
+        if current is None:
+            raise NotFound()
+        return current
+    
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[CSVStreamParser, JSONLinesStreamParser])
+    def bulk(self, request):
+        """
+        Bulk import
+
+        Streams a CSV (Content-Type: text/csv, with a header row) or
+        JSON-lines (Content-Type: application/x-ndjson) body of transactions
+        and inserts them in batches. Invalid rows are skipped and reported;
+        valid rows are still imported.
+
+        Row fields: amount, type, date, description (optional), and either
+        category (id) or category_name (matched against the user's
+        categories of the same type). Rows without a category are imported
+        as uncategorized.
+
+        Response:
+        - created (number)
+        - failed (number)
+        - errors: [ { line, errors } ] (first 100 failures)
+        """
+        # The streaming parsers hand over the unread body (415 for other types)
+        stream = request.data if hasattr(request.data, 'readline') else None
+        if request.content_type.startswith(CSVStreamParser.media_type):
+            rows = parse_csv(stream)
+        else:
+            rows = parse_json_lines(stream)
+        
+        result = import_transactions(request.user, rows)
+        return Response(result, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """
+        Bulk update
+
+        Sets the same field values on many transactions with one UPDATE
+        per 500 rows, after locking the selected rows.
+        Select the transactions by id or with the list filters:
+
+        - ids: [1, 2, 3] (up to 10000), or
+        - filter: { type, category, start_date, end_date } (at least one)
+        - changes: { category, amount, description, date, type } (at least one;
+          category may be null)
+
+        The selection only ever covers the user's own transactions; ids of
+        other users' transactions are ignored. As with single updates, a
+        categorized transaction's type must match its category's type; the
+        whole request is rejected otherwise.
+
+        Response:
+        - updated (number)
+        """
+        categories = CategoryCache(request.user)
+        serializer = TransactionBulkUpdateSerializer(data=request.data, context={'categories': categories})
+        serializer.is_valid(raise_exception=True)
+        queryset = self.select_transactions(serializer.validated_data)
+        updated = update_transactions(request.user, queryset, serializer.validated_data['changes'], categories)
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """
+        Bulk delete
+
+        Deletes many transactions with one DELETE per 500 rows, selected by
+        ``ids`` or ``filter`` exactly as for bulk update.
+
+        Response:
+        - deleted (number)
+        """
+        serializer = TransactionSelectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        deleted = delete_transactions(request.user, self.select_transactions(serializer.validated_data))
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+    
+    def select_transactions(self, selection):
+        """Return the user's transactions picked by a validated bulk selection."""
+        queryset = Transaction.objects.filter(user=self.request.user)
+        if 'ids' in selection:
+            return queryset.filter(id__in=selection['ids'])
+        return filter_transactions(queryset, selection['filter'])
+    
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=[CSVRenderer, NDJSONRenderer])
+    @method_decorator(conditional())
+    def export(self, request):
+        """
+        Export
+
+        Streams all of the user's transactions matching the list filters
+        (type, category, start_date, end_date) as CSV (default) or
+        newline-delimited JSON. Choose the format with ?format=csv or
+        ?format=ndjson, or an Accept header of text/csv or
+        application/x-ndjson. Columns match the transaction list fields.
+        """
+        return stream_transactions(self.get_queryset(), request.accepted_renderer.format)
+
+
+class BudgetViewSet(ConditionalGetMixin, ReplicaReadMixin, LeanListMixin, viewsets.ModelViewSet):
     """
     Budgets
 
-    CRUD operations for the authenticated user's budgets.
+    CRUD operations for the authenticated user's budgets, plus the
+    per-period spend history of one budget.
 
     Fields:
     - category (fk to Category, required)
@@ -119,88 +297,151 @@ class BudgetViewSet(viewsets.ModelViewSet):
     """
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
+    list_columns = BUDGET_COLUMNS
     
     def get_queryset(self):
         """Return budgets belonging to the authenticated user only."""
-        return Budget.objects.filter(user=self.request.user)
+        return Budget.objects.filter(user=self.request.user).select_related(
+            'category'
+        ).only(*BUDGET_FIELDS)
     
     def perform_create(self, serializer):
         """Assign the authenticated user when creating a budget."""
         serializer.save(user=self.request.user)
+    
+    @action(detail=True, methods=['get'], url_path='history', throttle_classes=[SummaryUserThrottle])
+    @method_decorator(conditional(vary_on_date=True))
+    def history(self, request, pk=None):
+        """
+        Budget history
+
+        Budgeted vs actual amounts of this budget for each of its last N
+        periods, oldest first, ending with the current one.
+
+        Query params:
+        - periods: number of periods (default 12, max 120)
+        - amount_format: float | string | cents (default float)
+
+        Response:
+        - id, category, period, budgeted_amount
+        - history: list of {period_start, period_end, actual_amount, remaining}
+        """
+        try:
+            periods = parse_history_periods(request.query_params.get('periods'))
+            amount_format = parse_amount_format(request.query_params.get('amount_format'))
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = budget_history([self.get_object()], timezone.localdate(), periods)
+        return Response(format_history(rows, amount_format)[0], status=status.HTTP_200_OK)
+
+
+def filter_transactions(queryset, filters):
+    """
+    Apply the transaction list filters (type, category, start_date,
+    end_date) found in the ``filters`` mapping to ``queryset``.
+    """
+    # Filter by type
+    transaction_type = filters.get('type', None)
+    if transaction_type:
+        queryset = queryset.filter(type=transaction_type)
+    
+    # Filter by category
+    category_id = filters.get('category', None)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    
+    # Filter by date range
+    start_date = filters.get('start_date', None)
+    end_date = filters.get('end_date', None)
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    
+    return queryset
 
 
 # Financial Summary Views
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([SummaryUserThrottle])
+@conditional()
+@replica_reads
 def financial_summary(request):
     """
     Financial summary
 
     Returns totals for income, expenses, and current balance for
-    the authenticated user.
+    the authenticated user, read from the daily rollup table and cached
+    until the user's data next changes.
+
+    Query params:
+    - amount_format: float | string | cents (default float)
 
     Response:
     - total_income (number)
     - total_expenses (number)
     - balance (number)
     """
+    try:
+        amount_format = parse_amount_format(request.query_params.get('amount_format'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     user = request.user
-    
-    # Get all transactions for the user
-    transactions = Transaction.objects.filter(user=user)
-    
-    # Calculate totals
-    total_income = transactions.filter(type='income').aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    total_expenses = transactions.filter(type='expense').aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    balance = total_income - total_expenses
-    
-    return Response({
-        'total_income': float(total_income),
-        'total_expenses': float(total_expenses),
-        'balance': float(balance),
-    }, status=status.HTTP_200_OK)
+    data = summary_cache.get_or_compute(
+        user.id, 'financial_summary', lambda: financial_totals(user), request.data_version
+    )
+    return Response(format_financial(data, amount_format), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([SummaryUserThrottle])
+@conditional()
+@replica_reads
 def category_summary(request):
     """
     Category summary
 
     Aggregated totals grouped by category name and type for the
-    authenticated user.
+    authenticated user, read from the daily rollup table and cached
+    until the user's data next changes.
+
+    Query params:
+    - amount_format: float | string | cents (default float)
 
     Response:
     - category_summary: [ { category__name, category__type, type, total } ]
     """
+    try:
+        amount_format = parse_amount_format(request.query_params.get('amount_format'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     user = request.user
-    
-    # Get transactions grouped by category
-    transactions = Transaction.objects.filter(user=user).values(
-        'category__name', 'category__type', 'type'
-    ).annotate(
-        total=Sum('amount')
-    ).order_by('-total')
-    
+    data = summary_cache.get_or_compute(
+        user.id, 'category_summary', lambda: category_totals(user), request.data_version
+    )
     return Response({
-        'category_summary': list(transactions)
+        'category_summary': format_categories(data, amount_format)
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([SummaryUserThrottle])
+@conditional(vary_on_date=True)
+@replica_reads
 def budget_status(request):
     """
     Budget status
 
     For each budget, returns budgeted amount, actual spend, and remaining
-    for the current period.
+    for the current weekly, monthly or yearly window. Actuals come from
+    the budgets' spend counters in the same query as the budgets, and the
+    result is cached until the user's data changes or the day rolls over.
+
+    Query params:
+    - amount_format: float | string | cents (default float)
 
     Response item fields:
     - category (string)
@@ -208,30 +449,238 @@ def budget_status(request):
     - actual_amount (number)
     - remaining (number)
     - period (string)
+    - period_start (date)
+    - period_end (date)
     """
+    try:
+        amount_format = parse_amount_format(request.query_params.get('amount_format'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     user = request.user
+    today = timezone.localdate()
+    data = summary_cache.get_or_compute(
+        user.id, f'budget_status:{today.isoformat()}', lambda: evaluate_budgets(user, today), request.data_version
+    )
+    return Response({
+        'budget_status': format_status(data, amount_format)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([SummaryUserThrottle])
+@conditional(vary_on_date=True)
+def budget_history_list(request):
+    """
+    Budget history
+
+    Budgeted vs actual amounts of every budget for each of its last N
+    weekly, monthly or yearly periods, oldest first. All budgets are read
+    with two queries (budgets and their spend counters), and the result
+    is cached until the user's data changes or the day rolls over.
+
+    Query params:
+    - periods: number of periods per budget (default 12, max 120)
+    - amount_format: float | string | cents (default float)
+
+    Response item fields:
+    - id (number)
+    - category (string)
+    - period (string)
+    - budgeted_amount (number)
+    - history (list of {period_start, period_end, actual_amount, remaining})
+    """
+    try:
+        periods = parse_history_periods(request.query_params.get('periods'))
+        amount_format = parse_amount_format(request.query_params.get('amount_format'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    user = request.user
+    today = timezone.localdate()
+    data = summary_cache.get_or_compute(
+        user.id, f'budget_history:{today.isoformat()}:{periods}',
+        lambda: budget_history(Budget.objects.filter(user=user).select_related('category'), today, periods),
+        request.data_version,
+    )
+    return Response({
+        'budget_history': format_history(data, amount_format)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([SummaryUserThrottle])
+@conditional()
+def analytics_timeseries(request):
+    """
+    Time series analytics
+
+    Income, expense and net totals bucketed by day, week or month,
+    aggregated in the database from the daily rollup table.
+
+    Query params:
+    - bucket: day | week | month (default month)
+    - start_date: YYYY-MM-DD (inclusive, optional)
+    - end_date: YYYY-MM-DD (inclusive, optional)
+    - breakdown: "category" to add one series per category
+    - amount_format: float | string | cents (default float)
+
+    Response:
+    - bucket (string)
+    - series: [ { period, income, expense, net } ]
+    - categories: [ { category, category_name, type, series: [ { period, total } ] } ]
+      (only with breakdown=category)
+    """
+    bucket = request.query_params.get('bucket', 'month')
+    if bucket not in BUCKETS:
+        return Response(
+            {'detail': f"bucket must be one of: {', '.join(BUCKETS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        start_date = _parse_date(request.query_params.get('start_date'))
+        end_date = _parse_date(request.query_params.get('end_date'))
+    except ValueError:
+        return Response(
+            {'detail': 'start_date and end_date must be YYYY-MM-DD'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        amount_format = parse_amount_format(request.query_params.get('amount_format'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    by_category = request.query_params.get('breakdown') == 'category'
     
-    budgets = Budget.objects.filter(user=user)
-    budget_data = []
-    
-    for budget in budgets:
-        # Get transactions for this budget's category in the current period
-        transactions = Transaction.objects.filter(
-            user=user,
-            category=budget.category,
-            date__gte=budget.start_date
+    user = request.user
+    name = f'timeseries:{bucket}:{start_date}:{end_date}:{by_category}'
+    try:
+        data = summary_cache.get_or_compute(
+            user.id, name, lambda: timeseries(user, bucket, start_date, end_date, by_category), request.data_version
         )
-        
-        actual_amount = transactions.aggregate(total=Sum('amount'))['total'] or 0
-        
-        budget_data.append({
-            'category': budget.category.name,
-            'budgeted_amount': float(budget.amount),
-            'actual_amount': float(actual_amount),
-            'remaining': float(budget.amount - actual_amount),
-            'period': budget.get_period_display(),
-        })
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(format_timeseries(data, amount_format), status=status.HTTP_200_OK)
+
+
+def _parse_date(value):
+    """Parse an optional YYYY-MM-DD query param."""
+    return date.fromisoformat(value) if value else None
+
+
+DASHBOARD_SECTIONS = ('financial_summary', 'category_summary', 'budget_status', 'transactions')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([SummaryUserThrottle])
+@conditional(vary_on_date=True)
+def dashboard(request):
+    """
+    Dashboard
+
+    Returns the financial summary, category summary, budget status and the
+    first page of transactions in one response. The financial totals are
+    derived from the category breakdown, so both come from one aggregate,
+    and every section shares the per-user summary cache with its
+    standalone endpoint.
+
+    Query params:
+    - fields: comma-separated sections to include (default: all of
+      financial_summary, category_summary, budget_status, transactions)
+    - page_size: transactions per page (keyset pagination, capped)
+    - amount_format: float | string | cents for the summary sections
+      (default float; transaction amounts are unaffected)
+
+    Response:
+    - financial_summary: { total_income, total_expenses, balance }
+    - category_summary: [ { category__name, category__type, type, total } ]
+    - budget_status: [ ... ] (see budget-status)
+    - transactions: { next, results } where next continues the
+      transactions list in cursor mode
+    """
+    fields = request.query_params.get('fields')
+    sections = [field.strip() for field in fields.split(',') if field.strip()] if fields else DASHBOARD_SECTIONS
+    unknown = sorted(set(sections) - set(DASHBOARD_SECTIONS))
+    if unknown:
+        return Response(
+            {'detail': f"Unknown fields: {', '.join(unknown)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        amount_format = parse_amount_format(request.query_params.get('amount_format'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
+    user = request.user
+    data = {}
+    if 'category_summary' in sections or 'financial_summary' in sections:
+        categories = summary_cache.get_or_compute(
+            user.id, 'category_summary', lambda: category_totals(user), request.data_version
+        )
+        if 'category_summary' in sections:
+            data['category_summary'] = format_categories(categories, amount_format)
+        if 'financial_summary' in sections:
+            financial = summary_cache.get_or_compute(
+                user.id, 'financial_summary', lambda: financial_totals_from_categories(categories),
+                request.data_version,
+            )
+            data['financial_summary'] = format_financial(financial, amount_format)
+    if 'budget_status' in sections:
+        today = timezone.localdate()
+        budgets = summary_cache.get_or_compute(
+            user.id, f'budget_status:{today.isoformat()}', lambda: evaluate_budgets(user, today),
+            request.data_version,
+        )
+        data['budget_status'] = format_status(budgets, amount_format)
+    if 'transactions' in sections:
+        queryset = values_queryset(Transaction.objects.filter(user=user), TRANSACTION_COLUMNS)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        paginator.base_url = request.build_absolute_uri(reverse('transaction-list') + '?pagination=cursor')
+        data['transactions'] = {
+            'next': paginator.get_next_link(),
+            'results': build_rows(page, TRANSACTION_COLUMNS),
+        }
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    """
+    Request metrics (admin only)
+
+    Per-view request counts and histograms of total time, SQL time,
+    render time and query count recorded by RequestMetricsMiddleware,
+    plus summary cache and throttling counters, for the process serving
+    the request.
+    """
     return Response({
-        'budget_status': budget_data
+        'views': metrics.snapshot(),
+        'summary_cache': summary_cache.stats(),
+        'throttling': throttling.stats(),
     }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def summary_cache_stats(request):
+    """
+    Summary cache statistics (admin only)
+
+    Hit, miss and invalidation counters of the summary cache for the
+    process that serves the request.
+    """
+    return Response(summary_cache.stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def throttle_stats(request):
+    """
+    Throttling statistics (admin only)
+
+    Allowed and throttled request counts per throttle scope for the
+    process that serves the request.
+    """
+    return Response(throttling.stats(), status=status.HTTP_200_OK)
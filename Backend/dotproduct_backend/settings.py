@@ -4,7 +4,8 @@ Django settings for dotproduct_backend project.
 
 from pathlib import Path
 import os
-from decouple import config
+import sys
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,12 +36,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so its timings cover the whole middleware stack
+    'api.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ShardContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -66,12 +70,137 @@ TEMPLATES = [
 WSGI_APPLICATION = 'dotproduct_backend.wsgi.application'
 
 # Database
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before
+# reuse. DB_POOL_MODE=pgbouncer is for a pgbouncer in transaction pooling
+# mode, which cannot carry server-side cursors across transactions.
+DB_ENGINE = config('DB_ENGINE', default='django.db.backends.sqlite3')
+DB_POOL_MODE = config('DB_POOL_MODE', default='')
+
+
+def database(prefix, **defaults):
+    """Build a DATABASES entry from the <prefix>ENGINE, <prefix>NAME, ... variables."""
+    engine = config(f'{prefix}ENGINE', default=defaults.get('ENGINE', DB_ENGINE))
+    name = config(f'{prefix}NAME', default=defaults.get('NAME', 'db.sqlite3'))
+    entry = {
+        'ENGINE': engine,
+        'NAME': BASE_DIR / name if engine == 'django.db.backends.sqlite3' else name,
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'pgbouncer',
+    }
+    for key in ('USER', 'PASSWORD', 'HOST', 'PORT'):
+        value = config(f'{prefix}{key}', default=defaults.get(key, ''))
+        if value:
+            entry[key] = value
+    return entry
+
+
 DATABASES = {
+    'default': database('DB_'),
+}
+
+# Optional read replica (see api/routers.py): set DB_REPLICA_NAME and/or
+# DB_REPLICA_HOST; other settings default to the primary's.
+if config('DB_REPLICA_NAME', default='') or config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = database('DB_REPLICA_', **{
+        key: config(f'DB_{key}', default='') for key in ('USER', 'PASSWORD', 'HOST', 'PORT')
+    }, NAME=config('DB_NAME', default='db.sqlite3'))
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+# Optional shards for the financial tables (see api/shards.py): DB_SHARDS
+# lists their database names, which become the aliases shard1, shard2, ...
+# Other settings default to the primary's and can be overridden with
+# DB_SHARD<n>_HOST etc. Append new shards at the end; never reorder them.
+SHARD_DATABASES = []
+for number, name in enumerate(config('DB_SHARDS', default='', cast=Csv()), 1):
+    DATABASES[f'shard{number}'] = database(f'DB_SHARD{number}_', **{
+        key: config(f'DB_{key}', default='') for key in ('USER', 'PASSWORD', 'HOST', 'PORT')
+    }, NAME=name)
+    SHARD_DATABASES.append(f'shard{number}')
+# Without DB_SHARDS, the test run adds two SQLite databases that the
+# sharding tests turn into shards with override_settings(SHARD_DATABASES=...).
+# It always adds one that the replica tests point api.routers at, so the
+# other tests keep reading from the primary.
+if sys.argv[1:2] == ['test']:
+    test_databases = ['test_replica'] if SHARD_DATABASES else ['shard1', 'shard2', 'test_replica']
+    for alias in test_databases:
+        DATABASES[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / f'{alias}.sqlite3'}
+# Seconds a user's placement is cached; moves wait SHARD_MOVE_GRACE_SECONDS
+# (keep it above the placement timeout and the longest request) before
+# copying and again before deleting the old rows.
+SHARD_PLACEMENT_TIMEOUT = config('SHARD_PLACEMENT_TIMEOUT', default=30, cast=int)
+SHARD_MOVE_GRACE_SECONDS = config('SHARD_MOVE_GRACE_SECONDS', default=SHARD_PLACEMENT_TIMEOUT + 5, cast=int)
+
+DATABASE_ROUTERS = ['api.shards.ShardRouter', 'api.routers.ReplicaRouter']
+# Reads go to the primary for this many seconds after a user's last write,
+# so they see it; keep it above the replica's worst replication lag.
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# Memcached in production so all workers share one cache.
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
     'default': {
-        'ENGINE': config('DB_ENGINE', default='django.db.backends.sqlite3'),
-        'NAME': BASE_DIR / config('DB_NAME', default='db.sqlite3'),
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='dotproduct'),
     }
 }
+SHARED_CACHE = CACHE_BACKEND != 'django.core.cache.backends.locmem.LocMemCache'
+
+# Per-user summary cache (see api/summary_cache.py)
+SUMMARY_CACHE_ALIAS = 'default'
+SUMMARY_CACHE_TIMEOUT = config('SUMMARY_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Transactions dated more than this many days ago are moved to the archive
+# by manage.py archive_transactions (see api/archive.py)
+TRANSACTION_RETENTION_DAYS = config('TRANSACTION_RETENTION_DAYS', default=730, cast=int)
+
+# Sessions
+# Database sessions by default. With a shared cache, cached_db reads them
+# from the cache and falls back to the database; with the local-memory
+# cache a logout in one worker would not reach the others, so the system
+# checks refuse it (see api/checks.py). signed_cookies keeps sessions
+# client-side with no server lookup (logout then cannot revoke copies of
+# the cookie).
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.db')
+SESSION_CACHE_ALIAS = 'default'
+
+# Authenticated users are cached for USER_CACHE_TIMEOUT seconds (see
+# api/user_cache.py; 0 disables it), by default only when the cache is
+# shared between workers. Sessions record the backend that logged them
+# in; ModelBackend stays listed so sessions created with it keep working.
+AUTHENTICATION_BACKENDS = [
+    'api.user_cache.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=60 if SHARED_CACHE else 0, cast=int)
+
+# Request throttling (see api/throttling.py); rates are in REST_FRAMEWORK
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Per-request query/latency metrics (see api/middleware.py)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # One JSON line per request with METRICS_LOG_LEVEL=INFO; off by default
+        'api.metrics': {
+            'handlers': ['console'],
+            'level': config('METRICS_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -111,10 +240,19 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
+    # Token buckets, see api/throttling.py. 'N/period' allows bursts of N.
+    # Client IPs come from REMOTE_ADDR unless NUM_PROXIES trusted proxies
+    # (e.g. 1 behind Render's load balancer) append to X-Forwarded-For.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    'DEFAULT_THROTTLE_RATES': {
+        'auth-ip': config('THROTTLE_AUTH_IP_RATE', default='20/min'),
+        'auth-user': config('THROTTLE_AUTH_USER_RATE', default='10/min'),
+        'summary': config('THROTTLE_SUMMARY_RATE', default='120/min'),
+    },
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
         # Enable Browsable API in development to provide interactive docs
         # It can be enabled in production as well if desired.
     ] + ([